@@ -0,0 +1,420 @@
+"""
+Distributed crawl mode: spread IMDb IDs, Wikipedia titles and subreddits
+across any number of worker processes or machines.
+
+Each worker heartbeats into a shared coordination backend, builds a
+consistent-hash ring from the live worker set and only crawls the items it
+owns. When a worker joins or stops heartbeating the ring is rebuilt, so only
+the items of the affected ring segments move to a new owner. Finished items
+are recorded in the backend and skipped by every worker (an item may be
+crawled twice if the ring changes while it is in flight). A failed fetch
+(HTTP error, timeout, network error) leaves the item pending and counts an
+attempt in the backend; after max_attempts failures the item is given up.
+Request pacing per host goes through the backend too, so the whole cluster
+shares one rate budget per site no matter how many workers are running.
+With --archive, every IMDb page a worker fetches is also recorded in a raw
+page archive (scrapers/page-archive.py) for offline re-extraction.
+
+Backends:
+    sqlite:///path/to/crawl.db   shared SQLite file (one machine or a shared disk)
+    redis://localhost:6379/0     Redis 6.2+ or a compatible server (pip install redis)
+
+Usage:
+    python scrapers/crawl-cluster.py --backend sqlite:///crawl.db --imdb-ids ids.txt --wikipedia-titles titles.txt
+    python scrapers/crawl-cluster.py --imdb-ids ids.txt --archive 'pages-{worker_id}.warc.gz'
+"""
+
+import abc
+import argparse
+import asyncio
+import bisect
+import hashlib
+import importlib.util
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+# Import using the actual filename
+spec = importlib.util.spec_from_file_location("location_record", Path(__file__).parent / "location-record.py")
+location_record = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(location_record)
+
+try:
+    import redis
+except ImportError:  # Only needed for the redis:// backend
+    redis = None
+
+# Requests per minute allowed per host across the whole cluster
+HOST_RATES = {
+    'www.imdb.com': 30,
+    'en.wikipedia.org': 60,
+    'www.reddit.com': 30,
+}
+
+# Items per done-status lookup sent to the backend
+DONE_BATCH_SIZE = 500
+
+# Which host each kind of work item is fetched from
+ITEM_HOSTS = {
+    'imdb': 'www.imdb.com',
+    'wikipedia': 'en.wikipedia.org',
+    'reddit': 'www.reddit.com',
+}
+
+
+def load_scraper(filename: str):
+    """Import a scraper module by filename (the files have hyphenated names)"""
+    spec = importlib.util.spec_from_file_location(filename.replace('-', '_')[:-3], Path(__file__).parent / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes"""
+
+    def __init__(self, nodes: List[str], replicas: int = 128):
+        self.nodes = sorted(nodes)
+        self._ring: List[Tuple[int, str]] = sorted(
+            (self._hash(f'{node}#{replica}'), node)
+            for node in self.nodes
+            for replica in range(replicas)
+        )
+        self._keys = [point for point, _ in self._ring]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._ring:
+            return None
+        index = bisect.bisect(self._keys, self._hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+    def _hash(self, value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+
+class CrawlCoordinator(abc.ABC):
+    """Shared state for a crawl: live workers, finished items and host pacing"""
+
+    @abc.abstractmethod
+    def heartbeat(self, worker_id: str):
+        """Mark worker_id as alive now"""
+
+    @abc.abstractmethod
+    def leave(self, worker_id: str):
+        """Remove worker_id from the live set"""
+
+    @abc.abstractmethod
+    def live_workers(self, ttl: float) -> List[str]:
+        """Workers that heartbeated within the last ttl seconds"""
+
+    @abc.abstractmethod
+    def mark_done(self, kind: str, item: str):
+        """Record item as finished for every worker"""
+
+    @abc.abstractmethod
+    def done_among(self, kind: str, items: List[str]) -> Set[str]:
+        """Which of the given items are done"""
+
+    @abc.abstractmethod
+    def record_failure(self, kind: str, item: str) -> int:
+        """Count a failed attempt at item; returns the attempts so far"""
+
+    @abc.abstractmethod
+    def reserve_slot(self, host: str, per_minute: int) -> float:
+        """Reserve the next request slot for host; returns its start time"""
+
+    async def acquire(self, host: str, per_minute: int):
+        """Wait until this worker may send one request to host"""
+        delay = self.reserve_slot(host, per_minute) - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class SQLiteCoordinator(CrawlCoordinator):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS workers (worker_id TEXT PRIMARY KEY, last_seen REAL NOT NULL);
+    CREATE TABLE IF NOT EXISTS done (kind TEXT NOT NULL, item TEXT NOT NULL, PRIMARY KEY (kind, item));
+    CREATE TABLE IF NOT EXISTS failures (
+        kind TEXT NOT NULL, item TEXT NOT NULL, attempts INTEGER NOT NULL, PRIMARY KEY (kind, item)
+    );
+    CREATE TABLE IF NOT EXISTS host_slots (host TEXT PRIMARY KEY, next_slot REAL NOT NULL);
+    """
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.executescript(self.SCHEMA)
+
+    def heartbeat(self, worker_id: str):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO workers (worker_id, last_seen) VALUES (?, ?)', (worker_id, time.time())
+        )
+
+    def leave(self, worker_id: str):
+        self.conn.execute('DELETE FROM workers WHERE worker_id = ?', (worker_id,))
+
+    def live_workers(self, ttl: float) -> List[str]:
+        rows = self.conn.execute('SELECT worker_id FROM workers WHERE last_seen >= ?', (time.time() - ttl,))
+        return [row[0] for row in rows]
+
+    def mark_done(self, kind: str, item: str):
+        self.conn.execute('INSERT OR IGNORE INTO done (kind, item) VALUES (?, ?)', (kind, item))
+
+    def done_among(self, kind: str, items: List[str]) -> Set[str]:
+        done = set()
+        for start in range(0, len(items), DONE_BATCH_SIZE):
+            batch = items[start:start + DONE_BATCH_SIZE]
+            done.update(row[0] for row in self.conn.execute(
+                f"SELECT item FROM done WHERE kind = ? AND item IN ({', '.join('?' * len(batch))})", (kind, *batch)
+            ))
+        return done
+
+    def record_failure(self, kind: str, item: str) -> int:
+        self.conn.execute(
+            """INSERT INTO failures (kind, item, attempts) VALUES (?, ?, 1)
+               ON CONFLICT (kind, item) DO UPDATE SET attempts = attempts + 1""",
+            (kind, item)
+        )
+        return self.conn.execute(
+            'SELECT attempts FROM failures WHERE kind = ? AND item = ?', (kind, item)
+        ).fetchone()[0]
+
+    def reserve_slot(self, host: str, per_minute: int) -> float:
+        interval = 60.0 / per_minute
+        # IMMEDIATE takes the write lock up front so two workers never get the same slot
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute('SELECT next_slot FROM host_slots WHERE host = ?', (host,)).fetchone()
+            slot = max(time.time(), row[0] if row else 0.0)
+            self.conn.execute(
+                'INSERT OR REPLACE INTO host_slots (host, next_slot) VALUES (?, ?)', (host, slot + interval)
+            )
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        return slot
+
+
+class RedisCoordinator(CrawlCoordinator):
+    # Atomically hand out the next request slot for a host
+    RESERVE_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local interval = tonumber(ARGV[2])
+    local slot = math.max(now, tonumber(redis.call('GET', KEYS[1]) or '0'))
+    redis.call('SET', KEYS[1], tostring(slot + interval), 'EX', 3600)
+    return tostring(slot)
+    """
+
+    def __init__(self, url: str, prefix: str = 'crawl'):
+        if redis is None:
+            raise RuntimeError("The redis:// backend requires: pip install redis")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._reserve = self.client.register_script(self.RESERVE_SCRIPT)
+
+    def heartbeat(self, worker_id: str):
+        self.client.zadd(f'{self.prefix}:workers', {worker_id: time.time()})
+
+    def leave(self, worker_id: str):
+        self.client.zrem(f'{self.prefix}:workers', worker_id)
+
+    def live_workers(self, ttl: float) -> List[str]:
+        return self.client.zrangebyscore(f'{self.prefix}:workers', time.time() - ttl, '+inf')
+
+    def mark_done(self, kind: str, item: str):
+        self.client.sadd(f'{self.prefix}:done:{kind}', item)
+
+    def done_among(self, kind: str, items: List[str]) -> Set[str]:
+        pipeline = self.client.pipeline(transaction=False)
+        for start in range(0, len(items), DONE_BATCH_SIZE):
+            pipeline.smismember(f'{self.prefix}:done:{kind}', items[start:start + DONE_BATCH_SIZE])
+        flags = [flag for batch in pipeline.execute() for flag in batch]
+        return {item for item, done in zip(items, flags) if done}
+
+    def record_failure(self, kind: str, item: str) -> int:
+        return self.client.hincrby(f'{self.prefix}:failures:{kind}', item, 1)
+
+    def reserve_slot(self, host: str, per_minute: int) -> float:
+        # Use the server clock so pacing does not depend on worker clock skew
+        seconds, microseconds = self.client.time()
+        server_now = seconds + microseconds / 1e6
+        slot = float(self._reserve(keys=[f'{self.prefix}:slot:{host}'], args=[server_now, 60.0 / per_minute]))
+        return time.time() + (slot - server_now)
+
+
+def create_coordinator(backend: str) -> CrawlCoordinator:
+    if backend.startswith('sqlite:///'):
+        return SQLiteCoordinator(backend[len('sqlite:///'):])
+    if backend.startswith('redis://') or backend.startswith('rediss://'):
+        return RedisCoordinator(backend)
+    raise ValueError(f"Unsupported backend: {backend}")
+
+
+class ClusterCrawler:
+    def __init__(self, coordinator: CrawlCoordinator, worker_id: Optional[str] = None,
+                 heartbeat_ttl: float = 60.0, output_path: Optional[str] = None, max_attempts: int = 5,
+                 archive_path: Optional[str] = None):
+        self.coordinator = coordinator
+        self.worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}'
+        self.heartbeat_ttl = heartbeat_ttl
+        self.output_path = output_path or f'crawl_{self.worker_id}.ndjson'
+        self.max_attempts = max_attempts
+        # Archives are append-only files, so each worker needs its own
+        self.archive = None
+        if archive_path:
+            self.archive = load_scraper('page-archive.py').RawPageArchive(archive_path.format(worker_id=self.worker_id))
+        self._ring: Optional[HashRing] = None
+        self._ring_checked = 0.0
+        self._scrapers = {}
+
+    def _refresh_ring(self) -> HashRing:
+        """Rebuild the ring if the live worker set has changed"""
+        self._ring_checked = time.monotonic()
+        workers = sorted(self.coordinator.live_workers(self.heartbeat_ttl))
+        if self._ring is None or workers != self._ring.nodes:
+            print(f"[{self.worker_id}] {len(workers)} live workers: rebalancing")
+            self._ring = HashRing(workers)
+        return self._ring
+
+    async def run(self, items: List[Tuple[str, str]], poll_interval: float = 10.0):
+        """Crawl the items this worker owns until every item is done cluster-wide"""
+        self.coordinator.heartbeat(self.worker_id)
+        heartbeat = asyncio.create_task(self._heartbeat_loop())
+        try:
+            with open(self.output_path, 'ab') as out:
+                remaining = list(items)
+                while True:
+                    remaining = self._pending(remaining)
+                    if not remaining:
+                        break
+
+                    ring = self._refresh_ring()
+                    crawled = 0
+                    rebalanced = False
+                    for kind, item in remaining:
+                        if ring.owner(f'{kind}:{item}') != self.worker_id:
+                            continue
+                        # The worker set is re-read as often as heartbeats are sent;
+                        # after a rebalance the pass restarts with the new owners
+                        if time.monotonic() - self._ring_checked >= self.heartbeat_ttl / 3:
+                            if self._refresh_ring() is not ring:
+                                rebalanced = True
+                                break
+                        await self.coordinator.acquire(ITEM_HOSTS[kind], HOST_RATES[ITEM_HOSTS[kind]])
+                        try:
+                            records = await self._crawl(kind, item)
+                        except Exception as e:
+                            self._failed(kind, item, e)
+                            continue
+                        location_record.write_ndjson(records, out)
+                        out.flush()
+                        self.coordinator.mark_done(kind, item)
+                        crawled += 1
+
+                    if not crawled and not rebalanced:
+                        # Everything left belongs to other workers or just failed;
+                        # wait in case one leaves or the site recovers
+                        await asyncio.sleep(poll_interval)
+        finally:
+            heartbeat.cancel()
+            self.coordinator.leave(self.worker_id)
+
+        print(f"[{self.worker_id}] All items done")
+
+    def _pending(self, items: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Drop items finished by any worker since the last pass"""
+        by_kind = {}
+        for kind, item in items:
+            by_kind.setdefault(kind, []).append(item)
+        done = {kind: self.coordinator.done_among(kind, names) for kind, names in by_kind.items()}
+        return [(kind, item) for kind, names in by_kind.items() for item in names if item not in done[kind]]
+
+    def _failed(self, kind: str, item: str, error: Exception):
+        """Leave a failed item pending for a retry, or give up after max_attempts"""
+        attempts = self.coordinator.record_failure(kind, item)
+        if attempts >= self.max_attempts:
+            print(f"[{self.worker_id}] Giving up on {kind}:{item} after {attempts} attempts: {error}")
+            self.coordinator.mark_done(kind, item)
+        else:
+            print(f"[{self.worker_id}] Error crawling {kind}:{item} (attempt {attempts}, will retry): {error}")
+
+    async def _heartbeat_loop(self):
+        """Keep this worker alive while it waits on fetches or host slots"""
+        while True:
+            await asyncio.sleep(self.heartbeat_ttl / 3)
+            self.coordinator.heartbeat(self.worker_id)
+
+    async def _crawl(self, kind: str, item: str) -> List:
+        """Fetch one item and convert its results to LocationRecords.
+
+        Fetch failures propagate so the caller can leave the item pending.
+        """
+        if kind == 'imdb':
+            scraper = self._scraper('imdb-scraper-updated.py', 'IMDbLocationScraper', archive=self.archive)
+            locations = await scraper.get_filming_locations(item)
+            converter = location_record.from_imdb
+        elif kind == 'wikipedia':
+            result = await self._scraper('wikipedia-scraper.py', 'WikipediaLocationScraper').get_filming_locations(item)
+            locations = result.get('locations', [])
+            converter = location_record.from_wikipedia
+        else:
+            locations = await self._scraper('reddit-scraper.py', 'RedditLocationScraper').search_subreddit(item)
+            converter = location_record.from_reddit
+
+        records = []
+        for location in locations:
+            try:
+                records.append(converter(location))
+            except location_record.RecordError as e:
+                print(f"[{self.worker_id}] Skipping invalid record from {kind}:{item}: {e}")
+        return records
+
+    def _scraper(self, filename: str, class_name: str, **options):
+        if filename not in self._scrapers:
+            scraper = getattr(load_scraper(filename), class_name)(**options)
+            scraper.raise_for_status = True
+            self._scrapers[filename] = scraper
+        return self._scrapers[filename]
+
+
+def read_items(path: Optional[str], kind: str) -> List[Tuple[str, str]]:
+    if not path:
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(kind, line.strip()) for line in f if line.strip() and not line.startswith('#')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run one worker of a sharded crawl')
+    parser.add_argument('--backend', default='sqlite:///crawl.db', help='sqlite:///path or redis://host:port/db')
+    parser.add_argument('--imdb-ids', help='File with one IMDb ID per line')
+    parser.add_argument('--wikipedia-titles', help='File with one Wikipedia page title per line')
+    parser.add_argument('--subreddits', nargs='*', default=None, help='Subreddits to search (defaults to the Reddit scraper list)')
+    parser.add_argument('--worker-id', help='Stable worker name (defaults to host-pid-random)')
+    parser.add_argument('--output', help='NDJSON output for this worker')
+    parser.add_argument('--max-attempts', type=int, default=5, help='Failed fetches before an item is given up')
+    parser.add_argument('--archive', help='Record fetched IMDb pages in this raw page archive; use one file per '
+                                          'worker, {worker_id} is replaced with the worker name')
+    args = parser.parse_args()
+
+    subreddits = args.subreddits
+    if subreddits is None:
+        subreddits = load_scraper('reddit-scraper.py').RedditLocationScraper().subreddits
+
+    items = (read_items(args.imdb_ids, 'imdb')
+             + read_items(args.wikipedia_titles, 'wikipedia')
+             + [('reddit', subreddit) for subreddit in subreddits])
+
+    crawler = ClusterCrawler(create_coordinator(args.backend), args.worker_id, output_path=args.output,
+                             max_attempts=args.max_attempts, archive_path=args.archive)
+    print(f"Worker {crawler.worker_id} starting with {len(items)} items")
+    asyncio.run(crawler.run(items))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,9 @@ from dataclasses import dataclass
 from datetime import datetime
 import ssl
 import certifi
+import argparse
+import importlib.util
+from pathlib import Path
 
 @dataclass
 class FilmingLocation:
@@ -22,13 +25,17 @@ class FilmingLocation:
     country: Optional[str]
 
 class IMDbLocationScraper:
-    def __init__(self):
+    def __init__(self, archive=None):
         self.base_url = "https://www.imdb.com"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
         }
+        # Optional RawPageArchive (scrapers/page-archive.py) recording every fetched page
+        self.archive = archive
+        # Raise on HTTP errors instead of returning no results (used by crawl-cluster.py)
+        self.raise_for_status = False
 
     async def get_filming_locations(self, imdb_id: str) -> List[FilmingLocation]:
         """Scrape filming locations for a specific IMDb ID"""
@@ -41,61 +48,73 @@ class IMDbLocationScraper:
         
         async with aiohttp.ClientSession(connector=connector) as session:
             async with session.get(url, headers=self.headers) as response:
+                body = await response.read()
+                if self.archive:
+                    self.archive.append(url, body, status=response.status,
+                                        content_type=response.headers.get('Content-Type'))
+                
                 if response.status != 200:
+                    if self.raise_for_status:
+                        response.raise_for_status()
                     print(f"Error: Status {response.status} for {url}")
                     return []
                 
-                html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                # Get production title
-                title_elem = soup.find('h3', attrs={'data-testid': 'hero__primary-text'})
-                if not title_elem:
-                    # Try alternate selector
-                    title_elem = soup.find('a', attrs={'data-testid': 'hero__pageTitle'})
-                
-                if not title_elem:
-                    print("Could not find title element")
-                    return []
-                
-                title_text = title_elem.text.strip()
-                
-                # Determine production type
-                production_type = 'tv_show' if 'TV Series' in html else 'movie'
+                html = body.decode(response.get_encoding(), errors='replace')
+                locations = self.parse_locations_page(html, imdb_id)
                 
-                # Extract title without year/type
-                production_title = re.sub(r'\s*\(.*?\)\s*$', '', title_text)
-                
-                locations = []
-                
-                # Find all location sections - try different selectors for modern IMDb
-                location_sections = soup.find_all('section', class_='ipc-page-section')
-                
-                # Also check for location listings
-                location_items = soup.find_all('div', attrs={'data-testid': 'item-body'})
-                if not location_items:
-                    location_items = soup.find_all('div', class_='ipc-html-content-inner-div')
-                
-                for item in location_items:
-                    # Extract location text
-                    location_text = item.get_text(strip=True)
-                    
-                    # Skip if this doesn't look like a location
-                    if not location_text or len(location_text) < 5:
-                        continue
-                    
-                    location_data = self._parse_location_text(location_text)
-                    if location_data:
-                        locations.append(FilmingLocation(
-                            production_title=production_title,
-                            production_type=production_type,
-                            imdb_id=imdb_id,
-                            **location_data
-                        ))
-                
-                print(f"Found {len(locations)} locations for {production_title}")
+                if locations:
+                    print(f"Found {len(locations)} locations for {locations[0].production_title}")
+                else:
+                    print(f"No locations found for {imdb_id}")
                 return locations
     
+    def parse_locations_page(self, html: str, imdb_id: str) -> List[FilmingLocation]:
+        """Parse filming locations out of a fetched locations page"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Get production title
+        title_elem = soup.find('h3', attrs={'data-testid': 'hero__primary-text'})
+        if not title_elem:
+            # Try alternate selector
+            title_elem = soup.find('a', attrs={'data-testid': 'hero__pageTitle'})
+        
+        if not title_elem:
+            return []
+        
+        title_text = title_elem.text.strip()
+        
+        # Determine production type
+        production_type = 'tv_show' if 'TV Series' in html else 'movie'
+        
+        # Extract title without year/type
+        production_title = re.sub(r'\s*\(.*?\)\s*$', '', title_text)
+        
+        locations = []
+        
+        # Also check for location listings
+        location_items = soup.find_all('div', attrs={'data-testid': 'item-body'})
+        if not location_items:
+            location_items = soup.find_all('div', class_='ipc-html-content-inner-div')
+        
+        for item in location_items:
+            # Extract location text
+            location_text = item.get_text(strip=True)
+            
+            # Skip if this doesn't look like a location
+            if not location_text or len(location_text) < 5:
+                continue
+            
+            location_data = self._parse_location_text(location_text)
+            if location_data:
+                locations.append(FilmingLocation(
+                    production_title=production_title,
+                    production_type=production_type,
+                    imdb_id=imdb_id,
+                    **location_data
+                ))
+        
+        return locations
+    
     def _parse_location_text(self, text: str) -> Optional[Dict]:
         """Parse location text from IMDb"""
         try:
@@ -168,9 +187,19 @@ class IMDbLocationScraper:
         
         return all_locations
 
+def open_archive(path: Optional[str]):
+    """RawPageArchive from scrapers/page-archive.py, or None when not archiving"""
+    if not path:
+        return None
+    # Import using the actual filename
+    spec = importlib.util.spec_from_file_location("page_archive", Path(__file__).parent / "page-archive.py")
+    page_archive = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(page_archive)
+    return page_archive.RawPageArchive(path)
+
 # Example usage
-async def main():
-    scraper = IMDbLocationScraper()
+async def main(archive_path: Optional[str] = None):
+    scraper = IMDbLocationScraper(archive=open_archive(archive_path))
     
     # Test with specific titles
     test_ids = [
@@ -201,4 +230,7 @@ async def main():
         print("\nNo locations found")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description='Scrape IMDb filming locations')
+    parser.add_argument('--archive', help='Record every fetched page in this archive (see scrapers/page-archive.py)')
+    args = parser.parse_args()
+    asyncio.run(main(args.archive))
@@ -8,6 +8,9 @@ from dataclasses import dataclass
 from datetime import datetime
 import ssl
 import certifi
+import argparse
+import importlib.util
+from pathlib import Path
 
 @dataclass
 class FilmingLocation:
@@ -22,11 +25,13 @@ class FilmingLocation:
     country: Optional[str]
 
 class IMDbLocationScraper:
-    def __init__(self):
+    def __init__(self, archive=None):
         self.base_url = "https://www.imdb.com"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
+        # Optional RawPageArchive (scrapers/page-archive.py) recording every fetched page
+        self.archive = archive
 
     async def get_filming_locations(self, imdb_id: str) -> List[FilmingLocation]:
         """Scrape filming locations for a specific IMDb ID"""
@@ -37,38 +42,47 @@ class IMDbLocationScraper:
         
         async with aiohttp.ClientSession(connector=connector) as session:
             async with session.get(url, headers=self.headers) as response:
-                if response.status != 200:
-                    return []
+                body = await response.read()
+                if self.archive:
+                    self.archive.append(url, body, status=response.status,
+                                        content_type=response.headers.get('Content-Type'))
                 
-                html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                # Get production title and type
-                title_elem = soup.find('h3', {'itemprop': 'name'})
-                if not title_elem:
+                if response.status != 200:
                     return []
                 
-                title_text = title_elem.text.strip()
-                production_type = 'tv_show' if 'TV Series' in title_text else 'movie'
-                production_title = re.sub(r'\s*\(.*?\)\s*$', '', title_text)
-                
-                locations = []
-                
-                # Find all location entries
-                location_divs = soup.find_all('div', class_='soda odd')
-                location_divs.extend(soup.find_all('div', class_='soda even'))
-                
-                for div in location_divs:
-                    location_data = self._parse_location_div(div)
-                    if location_data:
-                        locations.append(FilmingLocation(
-                            production_title=production_title,
-                            production_type=production_type,
-                            imdb_id=imdb_id,
-                            **location_data
-                        ))
-                
-                return locations
+                html = body.decode(response.get_encoding(), errors='replace')
+                return self.parse_locations_page(html, imdb_id)
+    
+    def parse_locations_page(self, html: str, imdb_id: str) -> List[FilmingLocation]:
+        """Parse filming locations out of a fetched locations page"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Get production title and type
+        title_elem = soup.find('h3', {'itemprop': 'name'})
+        if not title_elem:
+            return []
+        
+        title_text = title_elem.text.strip()
+        production_type = 'tv_show' if 'TV Series' in title_text else 'movie'
+        production_title = re.sub(r'\s*\(.*?\)\s*$', '', title_text)
+        
+        locations = []
+        
+        # Find all location entries
+        location_divs = soup.find_all('div', class_='soda odd')
+        location_divs.extend(soup.find_all('div', class_='soda even'))
+        
+        for div in location_divs:
+            location_data = self._parse_location_div(div)
+            if location_data:
+                locations.append(FilmingLocation(
+                    production_title=production_title,
+                    production_type=production_type,
+                    imdb_id=imdb_id,
+                    **location_data
+                ))
+        
+        return locations
     
     def _parse_location_div(self, div) -> Optional[Dict]:
         """Parse a single location div from IMDb"""
@@ -137,9 +151,19 @@ class IMDbLocationScraper:
         
         return all_locations
 
+def open_archive(path: Optional[str]):
+    """RawPageArchive from scrapers/page-archive.py, or None when not archiving"""
+    if not path:
+        return None
+    # Import using the actual filename
+    spec = importlib.util.spec_from_file_location("page_archive", Path(__file__).parent / "page-archive.py")
+    page_archive = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(page_archive)
+    return page_archive.RawPageArchive(path)
+
 # Example usage
-async def main():
-    scraper = IMDbLocationScraper()
+async def main(archive_path: Optional[str] = None):
+    scraper = IMDbLocationScraper(archive=open_archive(archive_path))
     
     # Scrape a specific title
     locations = await scraper.get_filming_locations('tt0111161')
@@ -151,4 +175,7 @@ async def main():
     print(f"Scraped {len(locations)} locations")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description='Scrape IMDb filming locations')
+    parser.add_argument('--archive', help='Record every fetched page in this archive (see scrapers/page-archive.py)')
+    args = parser.parse_args()
+    asyncio.run(main(args.archive))
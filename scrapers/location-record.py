@@ -0,0 +1,282 @@
+"""
+One typed record shape for every scraper, plus fast encoders.
+
+The scrapers each grew their own output shape:
+- IMDb:      FilmingLocation with state_province/address
+- Wikipedia: dicts with a short `name`, the full `location_name` and `source`
+- Reddit:    dicts with upvotes/source_url/created_at
+- Wikidata:  dicts with coordinates and Wikidata IDs
+
+LocationRecord covers all of them; the from_* helpers convert the existing
+shapes. Two encodings are provided:
+
+- JSON (one object per record) via orjson when installed, falling back to
+  the standard json module. Used for NDJSON output files, and for reading
+  them back as validated records (iter_ndjson).
+- Binary batches for passing records between processes: a small header and
+  length-prefixed frames, each frame a positional JSON array in FIELDS order.
+  No keys are repeated and decoding is a single loads + constructor call.
+"""
+
+import io
+import json
+import struct
+from dataclasses import dataclass, fields
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library json module
+    orjson = None
+
+@dataclass(slots=True)
+class LocationRecord:
+    production_title: str
+    location_name: str
+    source: str
+    production_type: str = 'movie'
+    imdb_id: Optional[str] = None
+    scene_description: Optional[str] = None
+    address: Optional[str] = None
+    city: Optional[str] = None
+    state_province: Optional[str] = None
+    country: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    source_url: Optional[str] = None
+    created_at: Optional[str] = None
+    upvotes: Optional[int] = None
+    wikidata_id: Optional[str] = None
+    production_id: Optional[Union[int, str]] = None
+
+FIELDS = tuple(field.name for field in fields(LocationRecord))
+FIELD_NAMES = frozenset(FIELDS)
+# Much cheaper than dataclasses.astuple, which deep-copies every value
+record_values = attrgetter(*FIELDS)
+REQUIRED_FIELDS = ('production_title', 'location_name', 'source')
+
+# Binary batch layout: magic, version, record count, then per record a
+# uint32 length followed by that many bytes of positional JSON
+BATCH_MAGIC = b'LR'
+BATCH_VERSION = 2
+BATCH_HEADER = struct.Struct('<2sBI')
+FRAME_LENGTH = struct.Struct('<I')
+
+
+class RecordError(ValueError):
+    """Raised when input cannot be turned into a valid LocationRecord"""
+
+
+def validate(record: LocationRecord) -> LocationRecord:
+    """Cheap structural checks; returns the record for chaining"""
+    for name in REQUIRED_FIELDS:
+        value = getattr(record, name)
+        if not isinstance(value, str) or not value:
+            raise RecordError(f"{name} must be a non-empty string")
+    if record.latitude is not None and not -90 <= record.latitude <= 90:
+        raise RecordError(f"latitude out of range: {record.latitude}")
+    if record.longitude is not None and not -180 <= record.longitude <= 180:
+        raise RecordError(f"longitude out of range: {record.longitude}")
+    return record
+
+
+def from_imdb(location) -> LocationRecord:
+    """Convert an IMDb FilmingLocation (or its __dict__)"""
+    data = location if isinstance(location, dict) else location.__dict__
+    return validate(LocationRecord(
+        production_title=data['production_title'],
+        location_name=data['location_name'],
+        source='imdb',
+        production_type=data.get('production_type') or 'movie',
+        imdb_id=data.get('imdb_id'),
+        scene_description=data.get('scene_description'),
+        address=data.get('address'),
+        city=data.get('city'),
+        state_province=data.get('state_province'),
+        country=data.get('country')
+    ))
+
+
+def from_wikipedia(data: Dict) -> LocationRecord:
+    """Convert a WikipediaLocationScraper location dict"""
+    source = data.get('source') or 'wikipedia'
+    production_title = data.get('production_title') or source.split(':', 1)[-1]
+    return validate(LocationRecord(
+        production_title=production_title,
+        location_name=data.get('name') or data.get('location_name'),
+        source=source,
+        address=data.get('location_name'),
+        city=data.get('city'),
+        state_province=data.get('state_province'),
+        country=data.get('country')
+    ))
+
+
+def from_reddit(data: Dict) -> LocationRecord:
+    """Convert a RedditLocationScraper location dict"""
+    return validate(LocationRecord(
+        production_title=data.get('production_title'),
+        location_name=data.get('location_name'),
+        source=data.get('source') or 'reddit',
+        production_type=data.get('production_type') or 'movie',
+        imdb_id=data.get('imdb_id'),
+        scene_description=data.get('scene_description'),
+        city=data.get('city'),
+        country=data.get('country'),
+        source_url=data.get('source_url'),
+        created_at=data.get('created_at'),
+        upvotes=data.get('upvotes'),
+        production_id=data.get('production_id')
+    ))
+
+
+def from_wikidata(data: Dict) -> LocationRecord:
+    """Convert a WikidataLocationScraper location dict"""
+    return validate(LocationRecord(
+        production_title=data.get('production_title'),
+        location_name=data.get('location_name'),
+        source=data.get('source') or 'wikidata',
+        production_type=data.get('production_type') or 'movie',
+        imdb_id=data.get('imdb_id'),
+        country=data.get('country'),
+        latitude=data.get('latitude'),
+        longitude=data.get('longitude'),
+        wikidata_id=data.get('wikidata_id')
+    ))
+
+
+def from_dict(data: Dict) -> LocationRecord:
+    """Convert any scraper output dict, picking the converter by source"""
+    source = data.get('source') or ''
+    if FIELD_NAMES.issuperset(data) and all(data.get(name) for name in REQUIRED_FIELDS):
+        # Already in LocationRecord shape (e.g. read back from NDJSON)
+        return validate(LocationRecord(**data))
+    if source.startswith('reddit'):
+        return from_reddit(data)
+    if source.startswith('wikipedia'):
+        return from_wikipedia(data)
+    if source.startswith('wikidata'):
+        return from_wikidata(data)
+    if source in ('', 'imdb') and data.get('imdb_id'):
+        return from_imdb(data)
+    # Hand-made files such as the TMDB fetcher's sample locations
+    return validate(LocationRecord(
+        production_title=data.get('production_title'),
+        location_name=data.get('location_name') or data.get('name'),
+        source=source or 'local',
+        production_type=data.get('production_type') or data.get('type') or 'movie',
+        scene_description=data.get('scene_description'),
+        address=data.get('address'),
+        city=data.get('city'),
+        state_province=data.get('state_province') or data.get('state'),
+        country=data.get('country'),
+        latitude=data.get('latitude'),
+        longitude=data.get('longitude'),
+        source_url=data.get('source_url')
+    ))
+
+
+def to_dict(record: LocationRecord) -> Dict:
+    """Plain dict of a record's set fields"""
+    return {name: value for name, value in zip(FIELDS, record_values(record)) if value is not None}
+
+
+def encode_json(record: LocationRecord) -> bytes:
+    """Serialize one record as a compact JSON object"""
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(dict(zip(FIELDS, record_values(record))), separators=(',', ':')).encode('utf-8')
+
+
+def write_ndjson(records: Iterable[LocationRecord], f) -> int:
+    """Append records to a binary or text file as NDJSON"""
+    lines = [encode_json(record) for record in records]
+    if not lines:
+        return 0
+    data = b'\n'.join(lines) + b'\n'
+    f.write(data.decode('utf-8') if isinstance(f, io.TextIOBase) else data)
+    return len(lines)
+
+
+def loads(data):
+    """Parse JSON text or bytes with orjson when installed"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def decode_json(data) -> Union[LocationRecord, Dict]:
+    """Parse one NDJSON line into a validated LocationRecord.
+
+    A line holding only a "key" is a delete marker from
+    scripts/snapshot-diff.py and is returned as that dict.
+    """
+    try:
+        values = loads(data)
+    except ValueError as e:
+        raise RecordError(f"invalid JSON: {e}")
+    if not isinstance(values, dict):
+        raise RecordError("expected a JSON object")
+    if values.keys() == {'key'}:
+        return values
+    try:
+        return from_dict(values)
+    except (KeyError, TypeError) as e:
+        raise RecordError(f"missing or unexpected field: {e}")
+
+
+def iter_ndjson(f, on_error: Optional[Callable[[int, RecordError], None]] = None
+                ) -> Iterator[Union[LocationRecord, Dict]]:
+    """Decode a binary or text NDJSON file line by line.
+
+    Invalid lines raise RecordError, or are passed to on_error with their
+    line number and skipped.
+    """
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield decode_json(line)
+        except RecordError as e:
+            if on_error is None:
+                raise
+            on_error(number, e)
+
+
+def _dumps_values(values: tuple) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(values)
+    return json.dumps(values, separators=(',', ':')).encode('utf-8')
+
+
+def _loads_values(data) -> list:
+    return orjson.loads(data) if orjson is not None else json.loads(bytes(data))
+
+
+def pack_batch(records: List[LocationRecord]) -> bytes:
+    """Encode records into one binary batch for inter-process transfer"""
+    parts = [BATCH_HEADER.pack(BATCH_MAGIC, BATCH_VERSION, len(records))]
+    for record in records:
+        payload = _dumps_values(record_values(record))
+        parts.append(FRAME_LENGTH.pack(len(payload)))
+        parts.append(payload)
+    return b''.join(parts)
+
+
+def unpack_batch(data: bytes) -> List[LocationRecord]:
+    """Decode a batch produced by pack_batch"""
+    magic, version, count = BATCH_HEADER.unpack_from(data, 0)
+    if magic != BATCH_MAGIC or version != BATCH_VERSION:
+        raise RecordError(f"Not a LocationRecord batch (magic={magic!r}, version={version})")
+
+    records = []
+    view = memoryview(data)
+    offset = BATCH_HEADER.size
+    for _ in range(count):
+        (length,) = FRAME_LENGTH.unpack_from(data, offset)
+        offset += FRAME_LENGTH.size
+        values = _loads_values(view[offset:offset + length])
+        offset += length
+        if len(values) != len(FIELDS):
+            raise RecordError(f"Expected {len(FIELDS)} fields, got {len(values)}")
+        records.append(LocationRecord(*values))
+    return records
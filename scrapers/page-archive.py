@@ -0,0 +1,236 @@
+"""
+Append-only archive of raw fetched pages, so parsers can be re-run without
+re-crawling.
+
+Every page is stored as its own gzip member holding a small WARC-style
+header block followed by the body, which keeps the archive a valid .gz
+stream while letting any single record be decompressed on its own. A
+CDX-like sidecar index (<archive>.cdx) records the URL, fetch time, status,
+byte offset and compressed length of each record.
+
+Usage:
+    # Fetch IMDb titles, recording every response in the archive
+    python scrapers/page-archive.py crawl pages.warc.gz tt0111161 tt0903747
+
+    # Replay the archive through the current parser
+    python scrapers/page-archive.py reextract pages.warc.gz --parser scrapers/imdb-scraper-updated.py
+"""
+
+import argparse
+import asyncio
+import codecs
+import gzip
+import importlib.util
+import mmap
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Import using the actual filename
+spec = importlib.util.spec_from_file_location("location_record", Path(__file__).parent / "location-record.py")
+location_record = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(location_record)
+
+IMDB_ID_PATTERN = re.compile(r'/title/(tt\d+)')
+CHARSET_PATTERN = re.compile(r'charset="?([\w.:-]+)', re.IGNORECASE)
+
+@dataclass
+class ArchiveEntry:
+    url: str
+    fetched_at: str
+    status: int
+    offset: int
+    length: int
+
+class RawPageArchive:
+    def __init__(self, path: str = 'pages.warc.gz'):
+        self.path = path
+        self.index_path = f'{path}.cdx'
+
+    def append(self, url: str, body: bytes, status: int = 200, content_type: Optional[str] = None) -> ArchiveEntry:
+        """Append one fetched page and its index line.
+
+        `content_type` should be the response's Content-Type header so replays
+        decode the body with the same charset as the original crawl.
+        """
+        content_type = ' '.join((content_type or 'text/html').split())
+        fetched_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        header = (
+            'WARC/1.0\r\n'
+            'WARC-Type: resource\r\n'
+            f'WARC-Target-URI: {url}\r\n'
+            f'WARC-Date: {fetched_at}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'X-Status: {status}\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            '\r\n'
+        ).encode('utf-8')
+        member = gzip.compress(header + body + b'\r\n\r\n')
+
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(member)
+
+        entry = ArchiveEntry(url, fetched_at, status, offset, len(member))
+        # The index is written after the data so it never points past the end
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(f'{entry.url} {entry.fetched_at} {entry.status} {entry.offset} {entry.length}\n')
+        return entry
+
+    def iter_index(self) -> Iterator[ArchiveEntry]:
+        """Yield index entries in archive order"""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 5:
+                    continue
+                url, fetched_at, status, offset, length = parts
+                yield ArchiveEntry(url, fetched_at, int(status), int(offset), int(length))
+
+    def latest_entries(self) -> List[ArchiveEntry]:
+        """Most recent successful capture of each URL"""
+        latest = {}
+        for entry in self.iter_index():
+            if entry.status == 200:
+                latest[entry.url] = entry
+        return sorted(latest.values(), key=lambda entry: entry.offset)
+
+    def read(self, entry: ArchiveEntry, data=None) -> Tuple[Dict[str, str], bytes]:
+        """Return (headers, body) of one record.
+
+        `data` may be an mmap of the archive for repeated random access.
+        """
+        if data is None:
+            with open(self.path, 'rb') as f:
+                f.seek(entry.offset)
+                member = f.read(entry.length)
+        else:
+            member = data[entry.offset:entry.offset + entry.length]
+        return parse_record(gzip.decompress(member))
+
+
+def record_charset(headers: Dict[str, str], default: str = 'utf-8') -> str:
+    """Charset from a record's Content-Type header, falling back to `default`"""
+    match = CHARSET_PATTERN.search(headers.get('Content-Type', ''))
+    if match:
+        try:
+            return codecs.lookup(match.group(1)).name
+        except LookupError:
+            pass
+    return default
+
+
+def parse_record(record: bytes) -> Tuple[Dict[str, str], bytes]:
+    head, _, rest = record.partition(b'\r\n\r\n')
+    headers = {}
+    for line in head.decode('utf-8').split('\r\n')[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip()] = value.strip()
+    length = int(headers.get('Content-Length', len(rest)))
+    return headers, rest[:length]
+
+
+# Re-extraction runs in worker processes that each map the archive once
+_worker_archive: Optional[RawPageArchive] = None
+_worker_data = None
+_worker_scraper = None
+
+
+def _init_worker(archive_path: str, parser_path: str):
+    global _worker_archive, _worker_data, _worker_scraper
+    _worker_archive = RawPageArchive(archive_path)
+    with open(archive_path, 'rb') as f:
+        _worker_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _worker_scraper = load_parser(parser_path).IMDbLocationScraper()
+
+
+def _reextract_chunk(entries: List[ArchiveEntry]) -> bytes:
+    """Worker: decompress and parse a chunk of archived pages into a record batch"""
+    locations = []
+    for entry in entries:
+        match = IMDB_ID_PATTERN.search(entry.url)
+        if not match:
+            continue
+        headers, body = _worker_archive.read(entry, _worker_data)
+        html = body.decode(record_charset(headers), errors='replace')
+        for location in _worker_scraper.parse_locations_page(html, match.group(1)):
+            try:
+                locations.append(location_record.from_imdb(location))
+            except location_record.RecordError as e:
+                print(f"Skipping invalid record from {entry.url}: {e}")
+    return location_record.pack_batch(locations)
+
+
+def load_parser(parser_path: str):
+    """Import a scraper module by path (the files have hyphenated names)"""
+    spec = importlib.util.spec_from_file_location("imdb_scraper", parser_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def reextract(archive_path: str, parser_path: str, output_path: str,
+              workers: Optional[int] = None, chunk_size: int = 50, all_captures: bool = False) -> int:
+    """Replay archived pages through a parser in parallel, writing NDJSON"""
+    archive = RawPageArchive(archive_path)
+    entries = list(archive.iter_index()) if all_captures else archive.latest_entries()
+    if not entries:
+        print("Archive is empty")
+        return 0
+    chunks = [entries[i:i + chunk_size] for i in range(0, len(entries), chunk_size)]
+
+    found = 0
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                             initializer=_init_worker, initargs=(archive_path, parser_path)) as executor, \
+            open(output_path, 'wb') as out:
+        for batch in executor.map(_reextract_chunk, chunks):
+            found += location_record.write_ndjson(location_record.unpack_batch(batch), out)
+
+    elapsed = time.monotonic() - started
+    print(f"Re-extracted {len(entries)} pages in {elapsed:.1f}s, found {found} locations")
+    return found
+
+
+async def crawl(archive_path: str, parser_path: str, imdb_ids: List[str]):
+    """Fetch titles with the given scraper, recording every page"""
+    scraper = load_parser(parser_path).IMDbLocationScraper(archive=RawPageArchive(archive_path))
+    for imdb_id in imdb_ids:
+        print(f"Scraping {imdb_id}...")
+        await scraper.get_filming_locations(imdb_id)
+        await asyncio.sleep(2)  # Be respectful with rate limiting
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Raw page archive for IMDb scrapes')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    crawl_parser = commands.add_parser('crawl', help='Fetch titles and archive the raw pages')
+    crawl_parser.add_argument('archive')
+    crawl_parser.add_argument('imdb_ids', nargs='+')
+    crawl_parser.add_argument('--parser', default=str(Path(__file__).parent / 'imdb-scraper-updated.py'))
+
+    reextract_parser = commands.add_parser('reextract', help='Re-run a parser over the archive')
+    reextract_parser.add_argument('archive')
+    reextract_parser.add_argument('--parser', default=str(Path(__file__).parent / 'imdb-scraper-updated.py'))
+    reextract_parser.add_argument('--output', default='reextracted_locations.ndjson')
+    reextract_parser.add_argument('--workers', type=int, default=None)
+    reextract_parser.add_argument('--chunk-size', type=int, default=50, help='Pages per worker task')
+    reextract_parser.add_argument('--all-captures', action='store_true', help='Replay every capture, not just the latest per URL')
+
+    args = parser.parse_args()
+    if args.command == 'crawl':
+        asyncio.run(crawl(args.archive, args.parser, args.imdb_ids))
+    else:
+        reextract(args.archive, args.parser, args.output, args.workers, args.chunk_size, args.all_captures)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,67 @@
 import asyncio
 import aiohttp
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator, TextIO
 import json
+import gzip
+import io
+import os
+import time
+import argparse
+import importlib.util
+import multiprocessing
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # Only needed for .zst archive dumps
+    zstandard = None
+
+# Import using the actual filename
+spec = importlib.util.spec_from_file_location("location_record", Path(__file__).parent / "location-record.py")
+location_record = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(location_record)
+
+spec = importlib.util.spec_from_file_location("title_matcher", Path(__file__).parent / "title-matcher.py")
+title_matcher = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = title_matcher  # So a TitleMatcher can be pickled to spawned workers
+spec.loader.exec_module(title_matcher)
+
+# Extraction never looks past this many characters of title + selftext
+MAX_SCAN_CHARS = 20000
+# Characters after a trigger phrase that may hold the location itself
+LOCATION_WINDOW = 200
+# Characters on either side of the chosen trigger searched for a title, in
+# addition to the post title itself (at most MAX_TITLE_CHARS, Reddit's limit)
+TITLE_WINDOW = 200
+MAX_TITLE_CHARS = 300
+# Trigger phrases considered per post
+MAX_TRIGGERS = 16
+# Reddit's api/info accepts at most this many fullnames per request
+COMMENT_BATCH_SIZE = 100
+
+# Keywords a new post must mention to be considered at all
+MONITOR_KEYWORDS = re.compile(r'filming location|shot at|filmed at|movie location', re.IGNORECASE)
+
+# Location trigger phrases, one group per original pattern in priority order
+LOCATION_TRIGGER = re.compile(
+    r'(filmed (?:at|in) )|(shooting (?:at|in) )|(locations? (?:at|in|:) )|(shot (?:at|in) )',
+    re.IGNORECASE
+)
+
+# Common patterns for movie/show titles
+TITLE_PATTERNS = [
+    re.compile(r'"([^"\n]{1,150})"'),  # Quoted titles
+    re.compile(r"'([^'\n]{1,150})'"),  # Single-quoted titles
+    re.compile(r'\b([A-Z][A-Za-z\s]{0,100}(?:Season \d+)?)\b'),  # Title Case
+]
 
 class RedditLocationScraper:
-    def __init__(self):
+    def __init__(self, matcher: Optional[title_matcher.TitleMatcher] = None):
         self.subreddits = [
             'MovieLocations',
             'FilmingLocations',
@@ -18,11 +73,24 @@ class RedditLocationScraper:
         self.headers = {
             'User-Agent': 'FilmingLocations/1.0'
         }
+        # Raise on HTTP errors instead of returning no results (used by crawl-cluster.py)
+        self.raise_for_status = False
+        # Resolves posts to known productions when set (see title-matcher.py)
+        self.title_matcher = matcher
         
     async def search_subreddit(self, subreddit: str, query: str = 'filming location') -> List[Dict]:
         """Search a subreddit for filming location posts"""
         locations = []
         
+        for post_data in await self._search_posts(subreddit, query):
+            location_info = self._location_from_post(post_data, subreddit)
+            if location_info:
+                locations.append(location_info)
+        
+        return locations
+    
+    async def _search_posts(self, subreddit: str, query: str = 'filming location') -> List[Dict]:
+        """Return raw post data for a subreddit search"""
         # Reddit JSON API
         url = f"{self.base_url}/r/{subreddit}/search.json"
         params = {
@@ -35,79 +103,105 @@ class RedditLocationScraper:
         async with aiohttp.ClientSession() as session:
             async with session.get(url, headers=self.headers, params=params) as response:
                 if response.status != 200:
-                    return locations
+                    if self.raise_for_status:
+                        response.raise_for_status()
+                    return []
                 
                 data = await response.json()
-                
-                for post in data.get('data', {}).get('children', []):
-                    post_data = post.get('data', {})
-                    
-                    # Extract location info from title and selftext
-                    location_info = self._extract_location_info(
-                        post_data.get('title', ''),
-                        post_data.get('selftext', '')
-                    )
-                    
-                    if location_info:
-                        location_info.update({
-                            'source': f"reddit:{subreddit}",
-                            'source_url': f"https://reddit.com{post_data.get('permalink', '')}",
-                            'created_at': datetime.fromtimestamp(post_data.get('created_utc', 0)).isoformat(),
-                            'upvotes': post_data.get('ups', 0)
-                        })
-                        locations.append(location_info)
+                return [post.get('data', {}) for post in data.get('data', {}).get('children', [])]
+    
+    def _location_from_post(self, post_data: Dict, subreddit: str) -> Optional[Dict]:
+        """Build a location record from a single Reddit submission"""
+        # Extract location info from title and selftext
+        location_info = self._extract_location_info(
+            post_data.get('title') or '',
+            post_data.get('selftext') or ''
+        )
         
-        return locations
+        if location_info:
+            location_info.update({
+                'source': f"reddit:{subreddit}",
+                'source_url': f"https://reddit.com{post_data.get('permalink', '')}",
+                'created_at': datetime.fromtimestamp(float(post_data.get('created_utc') or 0)).isoformat(),
+                'upvotes': post_data.get('ups', 0)
+            })
+        
+        return location_info
     
     def _extract_location_info(self, title: str, text: str) -> Optional[Dict]:
-        """Extract production and location information from post text"""
-        combined_text = f"{title} {text}"
-        
-        # Common patterns for movie/show titles
-        title_patterns = [
-            r'"([^"]+)"',  # Quoted titles
-            r"'([^']+)'",  # Single-quoted titles
-            r'\b([A-Z][A-Za-z\s]+(?:Season \d+)?)\b',  # Title Case
-        ]
+        """Extract production and location information from post text
         
-        # Location patterns
-        location_patterns = [
-            r'filmed (?:at|in) ([^.]+)',
-            r'shooting (?:at|in) ([^.]+)',
-            r'location[s]? (?:at|in|:) ([^.]+)',
-            r'shot (?:at|in) ([^.]+)',
-        ]
+        Only the first MAX_SCAN_CHARS characters are examined for trigger
+        phrases, and title patterns only run over the post title plus a window
+        around the chosen trigger, so the cost per post is capped regardless of
+        how long or malformed the selftext is.
+        """
+        combined_text = f"{title[:MAX_SCAN_CHARS]} {text[:MAX_SCAN_CHARS]}"[:MAX_SCAN_CHARS]
+        
+        # Try to extract location first - posts without a trigger phrase are
+        # rejected before any title matching happens
+        location = None
+        best_rank = None
+        trigger = None
+        for count, match in enumerate(LOCATION_TRIGGER.finditer(combined_text)):
+            if count >= MAX_TRIGGERS:
+                break
+            # Keep the original pattern priority: filmed > shooting > location > shot
+            rank = match.lastindex
+            if best_rank is not None and rank >= best_rank:
+                continue
+            window = combined_text[match.end():match.end() + LOCATION_WINDOW]
+            candidate = window.split('.', 1)[0].strip()
+            if candidate:
+                location = candidate
+                best_rank = rank
+                trigger = match
+                if rank == 1:
+                    break
+        
+        if not location:
+            return None
         
-        # Try to extract production title
+        # Try to extract production title from the post title and the text
+        # around the trigger phrase
+        title_text = (f"{title[:MAX_TITLE_CHARS]} "
+                      f"{combined_text[max(0, trigger.start() - TITLE_WINDOW):trigger.end() + TITLE_WINDOW]}")
         production_title = None
-        for pattern in title_patterns:
-            match = re.search(pattern, combined_text)
+        for pattern in TITLE_PATTERNS:
+            match = pattern.search(title_text)
             if match:
                 production_title = match.group(1).strip()
                 break
         
-        # Try to extract location
-        location = None
-        for pattern in location_patterns:
-            match = re.search(pattern, combined_text, re.IGNORECASE)
-            if match:
-                location = match.group(1).strip()
-                break
+        # Prefer a known title mentioned anywhere in the post over the guess
+        resolved = None
+        if self.title_matcher is not None:
+            resolved = self.title_matcher.match(combined_text, production_title)
+            if resolved:
+                production_title = resolved.production.title
         
         if production_title and location:
             # Further parse location for city/country
             location_parts = [p.strip() for p in location.split(',')]
             
-            return {
+            location_info = {
                 'production_title': production_title,
                 'location_name': location,
                 'city': location_parts[-2] if len(location_parts) > 1 else None,
                 'country': location_parts[-1] if len(location_parts) > 0 else None,
                 'scene_description': text[:500] if len(text) > 50 else None
             }
+            if resolved:
+                location_info['production_id'] = resolved.production.production_id
+                location_info['imdb_id'] = resolved.production.imdb_id
+            return location_info
         
         return None
     
+    def _is_candidate_post(self, title: str, text: str) -> bool:
+        """Cheap single-pass check for filming location keywords"""
+        return bool(MONITOR_KEYWORDS.search(title) or MONITOR_KEYWORDS.search(text, 0, MAX_SCAN_CHARS))
+    
     async def scrape_all_subreddits(self) -> List[Dict]:
         """Scrape all configured subreddits"""
         all_locations = []
@@ -135,25 +229,265 @@ class RedditLocationScraper:
                                 post_data = post.get('data', {})
                                 
                                 # Check if post mentions filming locations
-                                title = post_data.get('title', '').lower()
-                                selftext = post_data.get('selftext', '').lower()
+                                title = post_data.get('title') or ''
+                                selftext = post_data.get('selftext') or ''
                                 
-                                if any(keyword in title + selftext for keyword in 
-                                      ['filming location', 'shot at', 'filmed at', 'movie location']):
-                                    
-                                    location_info = self._extract_location_info(
-                                        post_data.get('title', ''),
-                                        post_data.get('selftext', '')
-                                    )
+                                if self._is_candidate_post(title, selftext):
+                                    location_info = self._extract_location_info(title, selftext)
                                     
                                     if location_info:
                                         await callback(location_info)
                 
                 await asyncio.sleep(300)  # Check every 5 minutes
 
+    async def harvest_comments(self, posts: List[Dict], callback, max_concurrency: int = 4) -> int:
+        """Extract locations from the comment trees of candidate posts.
+        
+        Posts whose listing shows no comments are skipped, then at most
+        max_concurrency comment trees are fetched at a time. Comments are
+        extracted as the tree is walked and "more" stubs are resolved in
+        batches of up to COMMENT_BATCH_SIZE fullnames instead of one request
+        per branch. "Continue this thread" stubs (threads nested too deep to
+        be inlined) carry no ids, so each one costs a request for the subtree
+        under its parent comment.
+        """
+        found = 0
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async with aiohttp.ClientSession(headers=self.headers) as session:
+            
+            async def emit(comment: Dict, post_data: Dict):
+                nonlocal found
+                location_info = self._location_from_comment(comment, post_data)
+                if location_info:
+                    found += 1
+                    await callback(location_info)
+            
+            async def fetch_tree(post_data: Dict, comment_id: Optional[str] = None) -> Optional[List]:
+                url = f"{self.base_url}/comments/{post_data['id']}.json"
+                params = {'limit': 500, 'sort': 'top'}
+                if comment_id:
+                    params['comment'] = comment_id
+                async with session.get(url, params=params) as response:
+                    if response.status != 200:
+                        return None
+                    listing = await response.json()
+                await asyncio.sleep(1)  # Rate limiting
+                return listing
+            
+            async def harvest_post(post_data: Dict):
+                async with semaphore:
+                    more_ids = []
+                    continue_ids = []
+                    listing = await fetch_tree(post_data)
+                    if listing and len(listing) > 1:
+                        for comment in self._walk_comments(listing[1], more_ids, continue_ids):
+                            await emit(comment, post_data)
+                    del listing
+                    
+                    while continue_ids:
+                        parent_id = continue_ids.pop()
+                        listing = await fetch_tree(post_data, parent_id)
+                        if listing and len(listing) > 1:
+                            for comment in self._walk_comments(listing[1], more_ids, continue_ids):
+                                # The subtree starts with its parent, already emitted
+                                if comment.get('id') != parent_id:
+                                    await emit(comment, post_data)
+                    
+                    for comment in await self._fetch_info(session, [f"t1_{comment_id}" for comment_id in more_ids]):
+                        await emit(comment, post_data)
+            
+            # Search listings already carry num_comments
+            candidates = [post for post in posts if post.get('id') and post.get('num_comments', 0) > 0]
+            await asyncio.gather(*(harvest_post(post_data) for post_data in candidates))
+        
+        return found
+    
+    async def _fetch_info(self, session: aiohttp.ClientSession, fullnames: List[str]) -> List[Dict]:
+        """Look up posts or comments by fullname, COMMENT_BATCH_SIZE per request"""
+        items = []
+        for start in range(0, len(fullnames), COMMENT_BATCH_SIZE):
+            batch = fullnames[start:start + COMMENT_BATCH_SIZE]
+            async with session.get(f"{self.base_url}/api/info.json", params={'id': ','.join(batch)}) as response:
+                if response.status != 200:
+                    continue
+                data = await response.json()
+            items.extend(child.get('data', {}) for child in data.get('data', {}).get('children', []))
+            await asyncio.sleep(1)  # Rate limiting
+        return items
+    
+    def _walk_comments(self, listing: Dict, more_ids: List[str], continue_ids: List[str]) -> Iterator[Dict]:
+        """Yield comments depth-first, collecting ids hidden behind "more" stubs
+        and the parent comment ids of "continue this thread" stubs"""
+        stack = list(reversed(listing.get('data', {}).get('children', [])))
+        while stack:
+            child = stack.pop()
+            data = child.get('data', {})
+            if child.get('kind') == 'more':
+                if data.get('children'):
+                    more_ids.extend(data['children'])
+                elif data.get('parent_id', '').startswith('t1_'):
+                    continue_ids.append(data['parent_id'][3:])
+                continue
+            if child.get('kind') != 't1':
+                continue
+            
+            yield data
+            
+            replies = data.get('replies')
+            if isinstance(replies, dict):
+                stack.extend(reversed(replies.get('data', {}).get('children', [])))
+    
+    def _location_from_comment(self, comment: Dict, post_data: Dict) -> Optional[Dict]:
+        """Build a location record from a comment, using its post title for context"""
+        body = comment.get('body') or ''
+        if not self._is_candidate_comment(body):
+            return None
+        
+        return self._location_from_post({
+            'title': post_data.get('title') or '',
+            'selftext': body,
+            'permalink': comment.get('permalink', ''),
+            'created_utc': comment.get('created_utc'),
+            'ups': comment.get('ups', 0)
+        }, post_data.get('subreddit') or comment.get('subreddit') or '')
+    
+    def _is_candidate_comment(self, body: str) -> bool:
+        """Comments must contain a location trigger of their own"""
+        return bool(LOCATION_TRIGGER.search(body, 0, MAX_SCAN_CHARS))
+    
+    async def scrape_comments(self, callback, query: str = 'filming location', max_concurrency: int = 4) -> int:
+        """Harvest comment locations for search results in every configured subreddit"""
+        found = 0
+        
+        for subreddit in self.subreddits:
+            print(f"Harvesting comments in r/{subreddit}...")
+            posts = await self._search_posts(subreddit, query)
+            found += await self.harvest_comments(posts, callback, max_concurrency)
+            await asyncio.sleep(2)  # Rate limiting
+        
+        return found
+
+    def _open_archive(self, archive_path: str) -> TextIO:
+        """Open a (possibly compressed) NDJSON submission dump as a text stream"""
+        if archive_path.endswith('.zst'):
+            if zstandard is None:
+                raise RuntimeError("Reading .zst archives requires: pip install zstandard")
+            # Pushshift-style dumps are compressed with a long window
+            decompressor = zstandard.ZstdDecompressor(max_window_size=2**31)
+            reader = decompressor.stream_reader(open(archive_path, 'rb'), read_across_frames=True, closefd=True)
+            return io.TextIOWrapper(reader, encoding='utf-8', errors='replace')
+        if archive_path.endswith('.gz'):
+            return gzip.open(archive_path, 'rt', encoding='utf-8', errors='replace')
+        return open(archive_path, 'r', encoding='utf-8', errors='replace')
+    
+    def _iter_archive_chunks(self, archive_path: str, chunk_size: int) -> Iterator[List[str]]:
+        """Stream raw archive lines in fixed-size chunks"""
+        with self._open_archive(archive_path) as f:
+            chunk = []
+            for line in f:
+                chunk.append(line)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+    
+    def scrape_archive(self, archive_path: str, output_path: str = 'reddit_archive_locations.ndjson',
+                       workers: Optional[int] = None, chunk_size: int = 5000) -> int:
+        """Extract locations from a zstd/gzip NDJSON submission dump.
+        
+        Lines are decoded, filtered to the configured subreddits and run through
+        _extract_location_info in worker processes. At most a few chunks are in
+        flight at once and results are appended to output_path as NDJSON as soon
+        as they complete, so memory use does not grow with the archive size.
+        
+        The title matcher is built once, here. Forked workers inherit it
+        copy-on-write; where fork is unavailable each worker is sent one
+        pickled copy at startup.
+        """
+        global _archive_title_matcher
+        workers = workers or os.cpu_count() or 1
+        max_pending = workers * 2
+        
+        _archive_title_matcher = self.title_matcher
+        if 'fork' in multiprocessing.get_all_start_methods():
+            pool_options = {'mp_context': multiprocessing.get_context('fork')}
+        else:
+            pool_options = {'initializer': _init_archive_worker, 'initargs': (self.title_matcher,)}
+        
+        lines_seen = 0
+        found = 0
+        started = time.monotonic()
+        
+        with ProcessPoolExecutor(max_workers=workers, **pool_options) as executor, \
+                open(output_path, 'wb') as out:
+            pending = deque()
+            
+            def drain_one():
+                nonlocal lines_seen, found
+                line_count, batch = pending.popleft().result()
+                found += location_record.write_ndjson(location_record.unpack_batch(batch), out)
+                out.flush()
+                lines_seen += line_count
+                elapsed = time.monotonic() - started
+                print(f"{lines_seen:,} lines, {found:,} locations "
+                      f"({lines_seen / elapsed if elapsed else 0:,.0f} records/sec)")
+            
+            for chunk in self._iter_archive_chunks(archive_path, chunk_size):
+                pending.append(executor.submit(_extract_archive_chunk, chunk, self.subreddits))
+                if len(pending) >= max_pending:
+                    drain_one()
+            
+            while pending:
+                drain_one()
+        
+        elapsed = time.monotonic() - started
+        print(f"Processed {lines_seen:,} records in {elapsed:.1f}s "
+              f"({lines_seen / elapsed if elapsed else 0:,.0f} records/sec), "
+              f"found {found:,} potential filming locations")
+        return found
+
+
+# Title matcher shared by every chunk a worker process handles
+_archive_title_matcher = None
+
+
+def _init_archive_worker(matcher: Optional[title_matcher.TitleMatcher]):
+    global _archive_title_matcher
+    _archive_title_matcher = matcher
+
+
+def _extract_archive_chunk(lines: List[str], subreddits: List[str]):
+    """Worker: parse, filter and extract one chunk of archive lines
+    
+    Results go back to the parent as a packed LocationRecord batch, which is
+    far cheaper to transfer than pickled dicts.
+    """
+    scraper = RedditLocationScraper(_archive_title_matcher)
+    # Dumps store subreddit names in their original case
+    wanted = {name.lower(): name for name in subreddits}
+    locations = []
+    
+    for line in lines:
+        try:
+            post_data = json.loads(line)
+        except ValueError:
+            continue
+        
+        subreddit = wanted.get(str(post_data.get('subreddit', '')).lower())
+        if not subreddit or 'title' not in post_data:
+            continue
+        
+        location_info = scraper._location_from_post(post_data, subreddit)
+        if location_info:
+            locations.append(location_record.from_reddit(location_info))
+    
+    return len(lines), location_record.pack_batch(locations)
+
 # Example usage
-async def main():
-    scraper = RedditLocationScraper()
+async def main(matcher=None):
+    scraper = RedditLocationScraper(matcher)
     locations = await scraper.scrape_all_subreddits()
     
     # Save to JSON
@@ -162,5 +496,38 @@ async def main():
     
     print(f"Found {len(locations)} potential filming locations")
 
+async def harvest_comments_main(output_path: str, matcher=None):
+    scraper = RedditLocationScraper(matcher)
+    
+    with open(output_path, 'wb') as out:
+        async def write_location(location_info: Dict):
+            location_record.write_ndjson([location_record.from_reddit(location_info)], out)
+        
+        found = await scraper.scrape_comments(write_location)
+    
+    print(f"Found {found} potential filming locations in comments")
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description='Scrape filming locations from Reddit')
+    parser.add_argument('--archive', help='zstd/gzip NDJSON submission dump to process instead of the live API')
+    parser.add_argument('--comments', action='store_true', help='Harvest comment trees of search results')
+    parser.add_argument('--output', help='NDJSON output for --archive or --comments')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for --archive')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='Lines per worker chunk for --archive')
+    parser.add_argument('--titles', action='append',
+                        help='Known productions to resolve titles against: local store .db, IMDb '
+                             'title.basics .tsv(.gz) or TMDB/scraper JSON (repeatable)')
+    args = parser.parse_args()
+    
+    matcher = None
+    if args.titles:
+        matcher = title_matcher.TitleMatcher.from_paths(args.titles)
+        print(f"Loaded {len(matcher)} known titles")
+    
+    if args.archive:
+        output = args.output or 'reddit_archive_locations.ndjson'
+        RedditLocationScraper(matcher).scrape_archive(args.archive, output, args.workers, args.chunk_size)
+    elif args.comments:
+        asyncio.run(harvest_comments_main(args.output or 'reddit_comment_locations.ndjson', matcher))
+    else:
+        asyncio.run(main(matcher))
@@ -0,0 +1,367 @@
+"""
+Known-title matcher for resolving Reddit posts to productions.
+
+Titles from a production list are normalized (case-folded, accents and
+punctuation stripped) into word sequences and compiled into an Aho-Corasick
+automaton over word ids. Scanning a post is one pass over its words, so the
+cost is linear in the text no matter how many titles are loaded.
+
+Title lists contain plenty of titles made of ordinary words ("Was Filmed",
+"In the House", "The Park"), so a title only counts when the post writes it
+like one: quoted, or capitalized with at least one word that is not a
+stopword or common word. Among those, a title the heuristic extractor also
+guessed (or one that was quoted) beats the rest, then the title with the
+most specific words. When no title occurs verbatim, a trigram index gives a
+fuzzy fallback for the guessed phrase (e.g. a misspelled quoted title).
+
+Production lists can be loaded from:
+- the local store database (productions table, scripts/local-store.py)
+- IMDb title.basics.tsv(.gz) dataset files
+- TMDB fetcher / scraper JSON or NDJSON output (title, imdb_id, tmdb_id)
+
+Usage: python scrapers/title-matcher.py --titles filming_locations.db "We visited the Heat diner..."
+"""
+
+import argparse
+import gzip
+import json
+import re
+import sqlite3
+import sys
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+WORD_PATTERN = re.compile(r'[^\W_]+')
+QUOTED_PATTERN = re.compile(r'"([^"\n]{1,150})"')
+YEAR_PATTERN = re.compile(r'\b(?:19|20)\d\d\b')
+IMDB_TITLE_TYPES = {'movie', 'tvMovie', 'tvSeries', 'tvMiniSeries'}
+
+# Unquoted single-word titles must be at least this long
+MIN_SINGLE_WORD_LENGTH = 3
+# Words that say nothing about which production is meant. Stopwords may stay
+# lowercase inside a capitalized title ("Lord of the Rings"); a title made
+# only of these and common words never matches unless quoted
+STOPWORDS = {
+    'a', 'an', 'the', 'of', 'in', 'on', 'at', 'to', 'for', 'from', 'by', 'with', 'and', 'or',
+    'but', 'is', 'was', 'are', 'were', 'be', 'been', 'it', 'its', 'i', 'me', 'my', 'we', 'our',
+    'your', 'went', 'go', 'got', 'saw', 'see', 'visited', 'near', 'into', 'out', 'up', 'over'
+}
+COMMON_WORDS = {
+    'the', 'and', 'her', 'him', 'his', 'you', 'she', 'they', 'them', 'this', 'that', 'there',
+    'here', 'home', 'house', 'city', 'street', 'park', 'beach', 'bridge', 'church', 'hotel',
+    'location', 'locations', 'scene', 'film', 'movie', 'show', 'season', 'episode', 'today',
+    'yesterday', 'now', 'then', 'what', 'why', 'who', 'where', 'when', 'found', 'filmed', 'shot'
+}
+
+# Fuzzy fallback: minimum Dice similarity, and trigrams shared by more titles
+# than this are too common to narrow anything down
+FUZZY_THRESHOLD = 0.7
+MAX_TRIGRAM_POSTINGS = 5000
+
+
+@dataclass
+class Production:
+    production_id: object
+    title: str
+    release_year: Optional[int] = None
+    imdb_id: Optional[str] = None
+
+
+@dataclass
+class TitleMatch:
+    production: Production
+    method: str  # 'exact' or 'fuzzy'
+    score: float
+
+
+def fold_word(word: str) -> str:
+    """Lowercase a word and strip accents"""
+    word = word.lower()
+    if word.isascii():
+        return word
+    return ''.join(c for c in unicodedata.normalize('NFKD', word) if not unicodedata.combining(c))
+
+
+def normalize_title(title: str) -> str:
+    return ' '.join(fold_word(word) for word in WORD_PATTERN.findall(title))
+
+
+def trigrams(text: str) -> set:
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleMatcher:
+    def __init__(self, productions: Iterable[Production]):
+        self.vocabulary: Dict[str, int] = {}
+        self.candidates: List[List[Production]] = []  # per title, productions sharing it
+        self.title_words: List[int] = []  # per title, number of words
+        self.title_specific: List[int] = []  # per title, words not in STOPWORDS/COMMON_WORDS
+
+        # Automaton: per node the word-id transitions, failure link, title
+        # ending here (-1 for none) and nearest failure ancestor with a title
+        self.goto: List[Dict[int, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[int] = [-1]
+        self.output_link: List[int] = [0]
+
+        self.trigram_index: Dict[str, List[int]] = {}
+        self.trigram_counts: List[int] = []
+
+        for production in productions:
+            self.add(production)
+        self._build_failure_links()
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def add(self, production: Production):
+        words = normalize_title(production.title).split()
+        if not words:
+            return
+
+        node = 0
+        for word in words:
+            word_id = self.vocabulary.setdefault(word, len(self.vocabulary))
+            next_node = self.goto[node].get(word_id)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][word_id] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(-1)
+                self.output_link.append(0)
+            node = next_node
+
+        if self.output[node] >= 0:
+            self.candidates[self.output[node]].append(production)
+            return
+
+        title_id = len(self.candidates)
+        self.output[node] = title_id
+        self.candidates.append([production])
+        self.title_words.append(len(words))
+        self.title_specific.append(sum(word not in STOPWORDS and word not in COMMON_WORDS for word in words))
+
+        grams = trigrams(' '.join(words))
+        self.trigram_counts.append(len(grams))
+        for gram in grams:
+            self.trigram_index.setdefault(gram, []).append(title_id)
+
+    def _build_failure_links(self):
+        """Breadth-first pass setting failure and output links"""
+        queue = list(self.goto[0].values())
+        for node in queue:
+            self.fail[node] = 0
+        for node in queue:
+            for word_id, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and word_id not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(word_id, 0)
+                self.output_link[child] = self.fail[child] if self.output[self.fail[child]] >= 0 \
+                    else self.output_link[self.fail[child]]
+
+    def scan(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Yield (title id, first word index, last word index) for every known
+        title written as a title in the text, in one pass over its words"""
+        for title_id, start, end, _ in self._scan(text):
+            yield title_id, start, end
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, int, int, bool]]:
+        """scan(), also telling whether each title sits inside a quoted span"""
+        vocabulary = self.vocabulary
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        output_link = self.output_link
+        spans = [match.span() for match in WORD_PATTERN.finditer(text)]
+        words = [text[start:end] for start, end in spans]
+        quote_ids = self._quote_ids(text, spans)
+
+        node = 0
+        for index, word in enumerate(words):
+            word_id = vocabulary.get(fold_word(word))
+            if word_id is None:
+                node = 0  # No title contains this word
+                continue
+            while node and word_id not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(word_id, 0)
+
+            found = node if output[node] >= 0 else output_link[node]
+            while found:
+                title_id = output[found]
+                start = index - self.title_words[title_id] + 1
+                quoted = quote_ids[start] >= 0 and quote_ids[start] == quote_ids[index]
+                if quoted or self._plausible(title_id, words[start:index + 1]):
+                    yield title_id, start, index, quoted
+                found = output_link[found]
+
+    def _quote_ids(self, text: str, spans: List[Tuple[int, int]]) -> List[int]:
+        """Per word, the index of the quoted span containing it (-1 for none),
+        in one sweep over the word and quote spans, which are both ordered"""
+        quotes = [match.span(1) for match in QUOTED_PATTERN.finditer(text)]
+        quote_ids = [-1] * len(spans)
+        quote = 0
+        for index, (start, end) in enumerate(spans):
+            while quote < len(quotes) and quotes[quote][1] <= start:
+                quote += 1
+            if quote < len(quotes) and quotes[quote][0] <= start and end <= quotes[quote][1]:
+                quote_ids[index] = quote
+        return quote_ids
+
+    def _plausible(self, title_id: int, words: List[str]) -> bool:
+        """Unquoted titles must be capitalized (stopwords after the first word
+        excepted) and contain a specific word"""
+        if not self.title_specific[title_id]:
+            return False
+        if len(words) == 1 and len(words[0]) < MIN_SINGLE_WORD_LENGTH:
+            return False
+        return not any(word[0].islower() and (index == 0 or fold_word(word) not in STOPWORDS)
+                       for index, word in enumerate(words))
+
+    def match(self, text: str, guess: Optional[str] = None) -> Optional[TitleMatch]:
+        """Best production mentioned in the text.
+
+        Titles that were quoted or appear in `guess` (the heuristic title)
+        win, then those with more specific words, then longer and earlier
+        ones. Without any verbatim title, `guess` is looked up fuzzily.
+        """
+        guessed = f' {normalize_title(guess)} ' if guess else None
+        best = None
+        for title_id, start, end, quoted in self._scan(text):
+            anchored = quoted or (guessed is not None and
+                                  f' {normalize_title(self.candidates[title_id][0].title)} ' in guessed)
+            key = (anchored, self.title_specific[title_id], end - start, -start)
+            if best is None or key > best[0]:
+                best = (key, title_id)
+        if best is not None:
+            return TitleMatch(self._pick(best[1], text), 'exact', 1.0)
+
+        if guess:
+            title_id, score = self.fuzzy(guess)
+            if title_id is not None:
+                return TitleMatch(self._pick(title_id, text), 'fuzzy', score)
+        return None
+
+    def fuzzy(self, phrase: str) -> Tuple[Optional[int], float]:
+        """Closest known title by trigram Dice similarity"""
+        grams = trigrams(normalize_title(phrase))
+        if not grams:
+            return None, 0.0
+
+        shared = Counter()
+        for gram in grams:
+            postings = self.trigram_index.get(gram)
+            if postings and len(postings) <= MAX_TRIGRAM_POSTINGS:
+                shared.update(postings)
+
+        best_id, best_score = None, 0.0
+        for title_id, count in shared.items():
+            score = 2 * count / (len(grams) + self.trigram_counts[title_id])
+            if score > best_score:
+                best_id, best_score = title_id, score
+        if best_score < FUZZY_THRESHOLD:
+            return None, best_score
+        return best_id, round(best_score, 3)
+
+    def _pick(self, title_id: int, text: str) -> Production:
+        """Choose among productions sharing a title, preferring a year the text mentions"""
+        candidates = self.candidates[title_id]
+        if len(candidates) > 1:
+            years = {int(year) for year in YEAR_PATTERN.findall(text)}
+            for production in candidates:
+                if production.release_year in years:
+                    return production
+        return candidates[0]
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str]) -> 'TitleMatcher':
+        """Build from local store databases, IMDb TSV files or JSON/NDJSON output"""
+        paths = list(paths)
+
+        def productions():
+            for path in paths:
+                if path.endswith('.db') or path.endswith('.sqlite'):
+                    yield from iter_store_productions(path)
+                elif path.endswith('.tsv') or path.endswith('.tsv.gz'):
+                    yield from iter_imdb_productions(path)
+                else:
+                    yield from iter_json_productions(path)
+        return cls(productions())
+
+
+def iter_store_productions(db_path: str) -> Iterator[Production]:
+    """Productions table of the local store"""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        for row in conn.execute('SELECT id, title, release_year, imdb_id FROM productions ORDER BY id'):
+            yield Production(*row)
+    finally:
+        conn.close()
+
+
+def iter_imdb_productions(path: str) -> Iterator[Production]:
+    """Movies and series from an IMDb title.basics.tsv dataset file"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        columns = f.readline().rstrip('\n').split('\t')
+        for line in f:
+            row = dict(zip(columns, line.rstrip('\n').split('\t')))
+            if row.get('titleType') not in IMDB_TITLE_TYPES or row.get('isAdult') == '1':
+                continue
+            year = row.get('startYear')
+            yield Production(
+                row['tconst'],
+                row['primaryTitle'],
+                int(year) if year and year.isdigit() else None,
+                row['tconst']
+            )
+
+
+def iter_json_productions(path: str) -> Iterator[Production]:
+    """Titles from TMDB fetcher output or any scraper JSON/NDJSON output"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.ndjson') or path.endswith('.jsonl'):
+            items = (json.loads(line) for line in f if line.strip())
+        else:
+            items = json.load(f)
+
+        seen = set()
+        for item in items:
+            title = item.get('title') or item.get('production_title')
+            if not title:
+                continue
+            imdb_id = item.get('imdb_id')
+            production_id = imdb_id or item.get('tmdb_id') or title
+            if production_id in seen:
+                continue
+            seen.add(production_id)
+            year = item.get('release_year') or (item.get('release_date') or '')[:4]
+            yield Production(production_id, title, int(year) if str(year).isdigit() else None, imdb_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Match known production titles in text')
+    parser.add_argument('--titles', action='append', required=True,
+                        help='Local store .db, IMDb title.basics .tsv(.gz) or JSON/NDJSON with titles (repeatable)')
+    parser.add_argument('text', nargs='*', help='Text to match (reads lines from stdin when omitted)')
+    args = parser.parse_args()
+
+    matcher = TitleMatcher.from_paths(args.titles)
+    print(f"Loaded {len(matcher)} titles", file=sys.stderr)
+
+    for text in args.text or sys.stdin:
+        match = matcher.match(text)
+        if match:
+            print(f"{match.production.title} ({match.production.production_id}) [{match.method}]")
+        else:
+            print("No match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import asyncio
+import aiohttp
+import bz2
+import gzip
+import json
+import re
+import argparse
+import importlib.util
+from pathlib import Path
+from typing import List, Dict, Optional, Iterator, Set
+
+# Import using the actual filename
+spec = importlib.util.spec_from_file_location("location_record", Path(__file__).parent / "location-record.py")
+location_record = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(location_record)
+
+# Wikidata properties and classes used below
+FILMING_LOCATION = 'P915'
+IMDB_ID = 'P345'
+COORDINATES = 'P625'
+COUNTRY = 'P17'
+INSTANCE_OF = 'P31'
+TV_SERIES_CLASSES = {'Q5398426', 'Q1259759', 'Q526877'}  # TV series, miniseries, web series
+COUNTRY_CLASSES = {'Q6256', 'Q3624078'}  # country, sovereign state
+
+# Pages are keyed on film IRIs: the subquery picks the next batch of films
+# after the last one seen, so the endpoint only orders the film IRIs past the
+# cursor instead of sorting the whole labelled P915 result to skip an OFFSET,
+# and a film's rows never straddle two pages
+SPARQL_QUERY = """
+SELECT ?film ?filmLabel ?imdb ?type ?location ?locationLabel ?coord ?countryLabel WHERE {
+  {
+    SELECT DISTINCT ?film WHERE {
+      ?film wdt:P915 [] ;
+            wdt:P345 [] .
+      FILTER(STR(?film) > "%s")
+    }
+    ORDER BY STR(?film)
+    LIMIT %d
+  }
+  ?film wdt:P915 ?location ;
+        wdt:P345 ?imdb .
+  OPTIONAL { ?film wdt:P31 ?tvClass . VALUES ?tvClass { wd:Q5398426 wd:Q1259759 wd:Q526877 } BIND("tv_show" AS ?type) }
+  OPTIONAL { ?location wdt:P625 ?coord . }
+  OPTIONAL { ?location wdt:P17 ?country . }
+  SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
+}
+"""
+
+# Throttled (429) and failed (5xx) SPARQL requests are retried this many
+# times with exponential backoff before the scrape is aborted
+MAX_RETRIES = 5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Dump lines start with the entity id, e.g. {"type":"item","id":"Q42",...
+ENTITY_ID_PATTERN = re.compile(r'"id":"(Q\d+)"')
+POINT_PATTERN = re.compile(r'Point\(([-\d.eE]+) ([-\d.eE]+)\)')
+
+class WikidataLocationScraper:
+    def __init__(self):
+        self.sparql_url = 'https://query.wikidata.org/sparql'
+        self.headers = {
+            'User-Agent': 'FilmingLocations/1.0 (Film Location Database)',
+            'Accept': 'application/sparql-results+json'
+        }
+
+    async def fetch_page(self, session: aiohttp.ClientSession, after: str, limit: int) -> List[Dict]:
+        """Fetch the filming location statements of the next `limit` films after `after`.
+
+        Throttling, server errors and timeouts are retried; once MAX_RETRIES
+        is exhausted the error is raised, so a failed page never looks like
+        the end of the results.
+        """
+        params = {'query': SPARQL_QUERY % (after, limit), 'format': 'json'}
+
+        for attempt in range(MAX_RETRIES + 1):
+            delay = 2 ** attempt
+            try:
+                async with session.get(self.sparql_url, params=params, headers=self.headers) as response:
+                    if response.status == 200:
+                        data = await response.json(content_type=None)
+                        return data.get('results', {}).get('bindings', [])
+                    if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                        response.raise_for_status()
+                    retry_after = response.headers.get('Retry-After', '')
+                    if retry_after.isdigit():
+                        delay = max(delay, int(retry_after))
+                    print(f"Status {response.status} after {after or 'start'}, retrying in {delay}s")
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                print(f"{type(e).__name__} after {after or 'start'}, retrying in {delay}s")
+            await asyncio.sleep(delay)
+
+    async def scrape_all(self, page_size: int = 2000, max_pages: Optional[int] = None) -> List[Dict]:
+        """Page through every title with a filming location and an IMDb ID
+
+        page_size counts films; each film contributes one row per location.
+        """
+        all_locations = []
+        seen = set()
+        timeout = aiohttp.ClientTimeout(total=120)
+
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            page = 0
+            after = ''
+            while max_pages is None or page < max_pages:
+                print(f"Fetching page {page + 1} (films after {after or 'start'})...")
+                rows = await self.fetch_page(session, after, page_size)
+
+                films = {row['film']['value'] for row in rows}
+                for row in rows:
+                    location = self._parse_sparql_row(row)
+                    # Extra coordinates/countries produce duplicate rows
+                    key = (location['wikidata_id'], location['location_wikidata_id'])
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    all_locations.append(location)
+
+                # Only a page with fewer films than requested is the last one
+                if len(films) < page_size:
+                    break
+                after = max(films)
+                page += 1
+                await asyncio.sleep(1)  # Rate limiting
+
+        return all_locations
+
+    def _parse_sparql_row(self, row: Dict) -> Dict:
+        """Convert a SPARQL result binding into a location record"""
+        value = lambda name: row.get(name, {}).get('value')
+        latitude, longitude = self._parse_point(value('coord'))
+
+        return {
+            'production_title': value('filmLabel'),
+            'production_type': value('type') or 'movie',
+            'imdb_id': value('imdb'),
+            'location_name': value('locationLabel'),
+            'country': value('countryLabel'),
+            'latitude': latitude,
+            'longitude': longitude,
+            'wikidata_id': value('film').rsplit('/', 1)[-1],
+            'location_wikidata_id': value('location').rsplit('/', 1)[-1],
+            'source': 'wikidata'
+        }
+
+    def _parse_point(self, point: Optional[str]):
+        """Parse a WKT 'Point(lon lat)' literal"""
+        match = POINT_PATTERN.search(point or '')
+        if not match:
+            return None, None
+        return float(match.group(2)), float(match.group(1))
+
+    def iter_dump_locations(self, dump_path: str) -> Iterator[Dict]:
+        """Stream filming locations out of a local Wikidata JSON dump.
+
+        Pass one collects titles with filming location and IMDb ID claims,
+        plus country labels. Pass two reads only the location entities those
+        titles point at. Lines are prefiltered with substring checks, so most
+        of the dump is never JSON-decoded.
+        """
+        films = []
+        location_ids: Set[str] = set()
+        country_labels: Dict[str, str] = {}
+
+        for line in self._iter_dump_lines(dump_path):
+            is_film = f'"{FILMING_LOCATION}"' in line
+            is_country = any(f'"{qid}"' in line for qid in COUNTRY_CLASSES)
+            if not is_film and not is_country:
+                continue
+
+            entity = json.loads(line)
+            claims = entity.get('claims', {})
+
+            if is_country and COUNTRY_CLASSES & set(self._item_values(claims, INSTANCE_OF)):
+                country_labels[entity['id']] = self._label(entity)
+
+            imdb_ids = self._string_values(claims, IMDB_ID)
+            locations = self._item_values(claims, FILMING_LOCATION)
+            if is_film and imdb_ids and locations and self._label(entity):
+                classes = set(self._item_values(claims, INSTANCE_OF))
+                films.append({
+                    'wikidata_id': entity['id'],
+                    'production_title': self._label(entity),
+                    'production_type': 'tv_show' if classes & TV_SERIES_CLASSES else 'movie',
+                    'imdb_id': imdb_ids[0],
+                    'locations': locations
+                })
+                location_ids.update(locations)
+
+        print(f"Found {len(films)} titles referencing {len(location_ids)} locations")
+
+        places = {}
+        for line in self._iter_dump_lines(dump_path):
+            match = ENTITY_ID_PATTERN.search(line, 0, 200)
+            if not match or match.group(1) not in location_ids:
+                continue
+
+            entity = json.loads(line)
+            claims = entity.get('claims', {})
+            coordinates = self._coordinate_values(claims)
+            countries = self._item_values(claims, COUNTRY)
+            places[entity['id']] = {
+                'location_name': self._label(entity),
+                'latitude': coordinates[0] if coordinates else None,
+                'longitude': coordinates[1] if coordinates else None,
+                'country': country_labels.get(countries[0]) if countries else None
+            }
+
+        for film in films:
+            for location_id in film['locations']:
+                place = places.get(location_id)
+                if not place or not place['location_name']:
+                    continue
+                yield {
+                    'production_title': film['production_title'],
+                    'production_type': film['production_type'],
+                    'imdb_id': film['imdb_id'],
+                    **place,
+                    'wikidata_id': film['wikidata_id'],
+                    'location_wikidata_id': location_id,
+                    'source': 'wikidata'
+                }
+
+    def _iter_dump_lines(self, dump_path: str) -> Iterator[str]:
+        """Yield one entity JSON document per line of a (compressed) dump"""
+        if dump_path.endswith('.bz2'):
+            f = bz2.open(dump_path, 'rt', encoding='utf-8')
+        elif dump_path.endswith('.gz'):
+            f = gzip.open(dump_path, 'rt', encoding='utf-8')
+        else:
+            f = open(dump_path, 'r', encoding='utf-8')
+
+        with f:
+            for line in f:
+                # The dump is one big JSON array with an entity per line
+                line = line.strip().rstrip(',')
+                if line.startswith('{'):
+                    yield line
+
+    def _label(self, entity: Dict) -> Optional[str]:
+        return entity.get('labels', {}).get('en', {}).get('value')
+
+    def _snak_values(self, claims: Dict, prop: str) -> List:
+        values = []
+        for claim in claims.get(prop, []):
+            if claim.get('rank') == 'deprecated':
+                continue
+            value = claim.get('mainsnak', {}).get('datavalue', {}).get('value')
+            if value is not None:
+                values.append(value)
+        return values
+
+    def _item_values(self, claims: Dict, prop: str) -> List[str]:
+        return [value['id'] for value in self._snak_values(claims, prop) if isinstance(value, dict) and 'id' in value]
+
+    def _string_values(self, claims: Dict, prop: str) -> List[str]:
+        return [value for value in self._snak_values(claims, prop) if isinstance(value, str)]
+
+    def _coordinate_values(self, claims: Dict) -> Optional[tuple]:
+        for value in self._snak_values(claims, COORDINATES):
+            if isinstance(value, dict) and 'latitude' in value:
+                return value['latitude'], value['longitude']
+        return None
+
+# Example usage
+async def main(max_pages: Optional[int]):
+    scraper = WikidataLocationScraper()
+    locations = await scraper.scrape_all(max_pages=max_pages)
+
+    with open('wikidata_locations.json', 'w') as f:
+        json.dump(locations, f, indent=2)
+
+    geocoded = sum(1 for loc in locations if loc['latitude'] is not None)
+    print(f"Saved {len(locations)} filming locations ({geocoded} geocoded) to wikidata_locations.json")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fetch structured filming locations from Wikidata')
+    parser.add_argument('--dump', help='Local Wikidata JSON dump (.json, .gz or .bz2) to read instead of SPARQL')
+    parser.add_argument('--output', default='wikidata_dump_locations.ndjson', help='NDJSON output for --dump')
+    parser.add_argument('--max-pages', type=int, default=None, help='Stop SPARQL paging after this many pages')
+    args = parser.parse_args()
+
+    if args.dump:
+        count = 0
+        with open(args.output, 'wb') as out:
+            for location in WikidataLocationScraper().iter_dump_locations(args.dump):
+                count += location_record.write_ndjson([location_record.from_wikidata(location)], out)
+        print(f"Saved {count} filming locations to {args.output}")
+    else:
+        asyncio.run(main(args.max_pages))
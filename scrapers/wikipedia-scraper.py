@@ -11,6 +11,8 @@ class WikipediaLocationScraper:
         self.headers = {
             'User-Agent': 'FilmingLocations/1.0 (Film Location Database)'
         }
+        # Raise on HTTP errors instead of returning no results (used by crawl-cluster.py)
+        self.raise_for_status = False
     
     async def search_film_articles(self, query: str) -> List[str]:
         """Search Wikipedia for film/TV show articles"""
@@ -41,6 +43,8 @@ class WikipediaLocationScraper:
         
         async with aiohttp.ClientSession() as session:
             async with session.get(self.base_url, params=params, headers=self.headers) as response:
+                if self.raise_for_status:
+                    response.raise_for_status()
                 data = await response.json()
                 
                 pages = data.get('query', {}).get('pages', {})
@@ -0,0 +1,111 @@
+"""
+Benchmark Reddit location extraction against pathological posts.
+
+Compares the current bounded extractor with the original unbounded regexes
+on inputs built to trigger heavy scanning/backtracking (huge self-posts with
+no sentence breaks, long Title Case runs, unbalanced quotes, trigger spam).
+
+Python's re engine backtracks linearly on the original patterns, so the
+legacy cost grows with post size rather than exponentially. The worst case
+is the Title Case pattern backing off through long whitespace runs that end
+without a word boundary (whitespace_backtrack). A multi-megabyte post of that
+shape stalls the legacy extractor for hundreds of milliseconds, while the
+current extractor stays flat.
+
+Usage: python scripts/bench-reddit-extraction.py [--size 2000000] [--repeat 5]
+"""
+
+import argparse
+import importlib.util
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Import using the actual filename
+spec = importlib.util.spec_from_file_location(
+    "reddit_scraper", Path(__file__).parent.parent / "scrapers" / "reddit-scraper.py"
+)
+reddit_scraper = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(reddit_scraper)
+RedditLocationScraper = reddit_scraper.RedditLocationScraper
+
+
+def legacy_extract(title: str, text: str) -> Optional[Dict]:
+    """The original unbounded extractor, kept for comparison"""
+    combined_text = f"{title} {text}"
+    production_title = None
+    for pattern in [r'"([^"]+)"', r"'([^']+)'", r'\b([A-Z][A-Za-z\s]+(?:Season \d+)?)\b']:
+        match = re.search(pattern, combined_text)
+        if match:
+            production_title = match.group(1).strip()
+            break
+    location = None
+    for pattern in [r'filmed (?:at|in) ([^.]+)', r'shooting (?:at|in) ([^.]+)',
+                    r'location[s]? (?:at|in|:) ([^.]+)', r'shot (?:at|in) ([^.]+)']:
+        match = re.search(pattern, combined_text, re.IGNORECASE)
+        if match:
+            location = match.group(1).strip()
+            break
+    if production_title and location:
+        location_parts = [p.strip() for p in location.split(',')]
+        return {
+            'production_title': production_title,
+            'location_name': location,
+            'city': location_parts[-2] if len(location_parts) > 1 else None,
+            'country': location_parts[-1] if len(location_parts) > 0 else None,
+            'scene_description': text[:500] if len(text) > 50 else None
+        }
+    return None
+
+
+def pathological_posts(size: int) -> Dict[str, tuple]:
+    """Build posts that are expensive for naive patterns"""
+    return {
+        'title_case_run': ('Where Was This', 'Aaaa Bbbb ' * (size // 10)),
+        'whitespace_backtrack': ('where was this', 'A' + ' \t' * (size // 2) + '! filmed at Somewhere.'),
+        'whitespace_runs': ('where was this', ('A' + ' ' * 60 + '!') * (size // 62) + ' filmed at Somewhere.'),
+        'comma_flood': ('"Heat" diner', 'filmed at ' + 'x,' * (size // 2)),
+        'no_sentence_break': ('"Heat" diner', 'filmed at ' + 'x, ' * (size // 3)),
+        'unbalanced_quotes': ('Where was this shot', '"abc ' * (size // 5) + ' shot at Somewhere.'),
+        'trigger_spam': ('Some Movie', 'shot at location: ' * (size // 18)),
+        'irrelevant_long_post': ('just a question', 'lorem ipsum dolor sit amet ' * (size // 27)),
+        'normal_post': ('"Breaking Bad" house', 'Walter White house was filmed at 3828 Piermont Dr NE, Albuquerque, USA. Great spot.'),
+    }
+
+
+def time_extractor(extract: Callable, title: str, text: str, repeat: int) -> float:
+    """Return the worst wall time over repeat runs in milliseconds"""
+    worst = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract(title, text)
+        worst = max(worst, time.perf_counter() - start)
+    return worst * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Reddit location extraction')
+    parser.add_argument('--size', type=int, default=2000000, help='Approximate selftext size in characters')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per input')
+    parser.add_argument('--skip-legacy', action='store_true', help='Only time the current extractor')
+    args = parser.parse_args()
+
+    scraper = RedditLocationScraper()
+    rows: List[tuple] = []
+
+    for name, (title, text) in pathological_posts(args.size).items():
+        current_ms = time_extractor(scraper._extract_location_info, title, text, args.repeat)
+        legacy_ms = None if args.skip_legacy else time_extractor(legacy_extract, title, text, args.repeat)
+        rows.append((name, len(text), current_ms, legacy_ms))
+
+    print(f"{'input':<22}{'chars':>10}{'current ms':>12}{'legacy ms':>12}")
+    for name, chars, current_ms, legacy_ms in rows:
+        legacy = f"{legacy_ms:>12.2f}" if legacy_ms is not None else f"{'-':>12}"
+        print(f"{name:<22}{chars:>10,}{current_ms:>12.2f}{legacy}")
+
+    print(f"\nWorst case per post (current): {max(row[2] for row in rows):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Precomputed map clusters over the local location store (scripts/local-store.py).
+
+Every geocoded location is counted into one Web Mercator tile cell per zoom
+level (the same z/x/y scheme as slippy map tiles). Each cell keeps a count,
+coordinate sums for its centroid and a representative location id, so a map
+viewport is answered from the cells it covers instead of every location row.
+
+Triggers on the locations table queue each inserted, re-geocoded or deleted
+location in geo_pending; refresh() folds only those into the cell counts, so
+reloading scraper output costs time proportional to what changed.
+
+Usage:
+    python scripts/geo-aggregates.py refresh [--db filming_locations.db]
+    python scripts/geo-aggregates.py view 10 34.0 34.2 -118.5 -118.2
+"""
+
+import argparse
+import importlib.util
+import math
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+# Import using the actual filename
+spec = importlib.util.spec_from_file_location("local_store", Path(__file__).parent / "local-store.py")
+local_store = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(local_store)
+
+MAX_ZOOM = 18
+# Cells per map tile side is 2 ** TILE_CELL_DEPTH (8x8 clusters per tile)
+TILE_CELL_DEPTH = 3
+MAX_LATITUDE = 85.05112878  # Web Mercator cut-off
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS geo_cells (
+    zoom INTEGER NOT NULL,
+    x INTEGER NOT NULL,
+    y INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    lat_sum REAL NOT NULL,
+    lon_sum REAL NOT NULL,
+    location_id INTEGER,
+    PRIMARY KEY (zoom, x, y)
+) WITHOUT ROWID;
+
+-- What each location currently contributes, so changes can be subtracted
+CREATE TABLE IF NOT EXISTS geo_members (
+    location_id INTEGER PRIMARY KEY,
+    x INTEGER NOT NULL,
+    y INTEGER NOT NULL,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS geo_members_tile ON geo_members (x, y);
+
+CREATE TABLE IF NOT EXISTS geo_pending (location_id INTEGER PRIMARY KEY);
+
+CREATE TRIGGER IF NOT EXISTS geo_location_insert AFTER INSERT ON locations
+WHEN NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+BEGIN
+    INSERT OR IGNORE INTO geo_pending (location_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS geo_location_update AFTER UPDATE OF latitude, longitude ON locations
+BEGIN
+    INSERT OR IGNORE INTO geo_pending (location_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS geo_location_delete AFTER DELETE ON locations
+BEGIN
+    INSERT OR IGNORE INTO geo_pending (location_id) VALUES (OLD.id);
+END;
+"""
+
+UPSERT_CELL = """
+INSERT INTO geo_cells (zoom, x, y, count, lat_sum, lon_sum, location_id)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (zoom, x, y) DO UPDATE SET
+    count = count + excluded.count,
+    lat_sum = lat_sum + excluded.lat_sum,
+    lon_sum = lon_sum + excluded.lon_sum,
+    location_id = MIN(location_id, COALESCE(excluded.location_id, location_id))
+"""
+
+
+def tile_for(latitude: float, longitude: float, zoom: int = MAX_ZOOM) -> Tuple[int, int]:
+    """Web Mercator tile containing a point"""
+    latitude = max(-MAX_LATITUDE, min(MAX_LATITUDE, latitude))
+    n = 1 << zoom
+    x = int((longitude + 180.0) / 360.0 * n)
+    lat_rad = math.radians(latitude)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lon, max_lon) of a tile"""
+    n = 1 << zoom
+    lat = lambda row: math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+    return lat(y + 1), lat(y), x / n * 360.0 - 180.0, (x + 1) / n * 360.0 - 180.0
+
+
+class GeoAggregates:
+    def __init__(self, db_path: str = 'filming_locations.db', readonly: bool = False):
+        if readonly:
+            self.conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True, check_same_thread=False)
+            return
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        installed = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'geo_pending'"
+        ).fetchone()
+        self.conn.executescript(local_store.SCHEMA)
+        self.conn.executescript(SCHEMA)
+        if not installed:
+            # Locations stored before the triggers existed go through the same queue
+            with self.conn:
+                self.conn.execute(
+                    'INSERT OR IGNORE INTO geo_pending (location_id) '
+                    'SELECT id FROM locations WHERE latitude IS NOT NULL AND longitude IS NOT NULL'
+                )
+
+    def close(self):
+        self.conn.close()
+
+    def pending(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM geo_pending').fetchone()[0]
+
+    def refresh(self, batch_size: int = 10000) -> int:
+        """Fold queued location changes into the cell counts"""
+        processed = 0
+        while True:
+            with self.conn:
+                ids = [row[0] for row in self.conn.execute(
+                    'SELECT location_id FROM geo_pending ORDER BY location_id LIMIT ?', (batch_size,)
+                )]
+                if not ids:
+                    return processed
+                self._apply(ids)
+                self.conn.executemany('DELETE FROM geo_pending WHERE location_id = ?', ((i,) for i in ids))
+            processed += len(ids)
+
+    def _apply(self, ids: List[int]):
+        deltas: Dict[Tuple[int, int, int], list] = {}
+        removed = []
+
+        def add(x: int, y: int, sign: int, latitude: float, longitude: float, location_id):
+            for zoom in range(MAX_ZOOM + 1):
+                shift = MAX_ZOOM - zoom
+                cell = deltas.setdefault((zoom, x >> shift, y >> shift), [0, 0.0, 0.0, None])
+                cell[0] += sign
+                cell[1] += sign * latitude
+                cell[2] += sign * longitude
+                if location_id is not None and (cell[3] is None or location_id < cell[3]):
+                    cell[3] = location_id
+
+        placeholders = ','.join('?' * len(ids))
+        old = {row[0]: row[1:] for row in self.conn.execute(
+            f'SELECT location_id, x, y, latitude, longitude FROM geo_members WHERE location_id IN ({placeholders})', ids
+        )}
+        new = {row[0]: row[1:] for row in self.conn.execute(
+            f'SELECT id, latitude, longitude FROM locations '
+            f'WHERE id IN ({placeholders}) AND latitude IS NOT NULL AND longitude IS NOT NULL', ids
+        )}
+
+        for location_id in ids:
+            previous = old.get(location_id)
+            current = new.get(location_id)
+            if previous and current and tuple(previous[2:]) == tuple(current):
+                continue
+            if previous:
+                x, y, latitude, longitude = previous
+                add(x, y, -1, latitude, longitude, None)
+                removed.append(location_id)
+                self.conn.execute('DELETE FROM geo_members WHERE location_id = ?', (location_id,))
+            if current:
+                latitude, longitude = current
+                x, y = tile_for(latitude, longitude)
+                add(x, y, 1, latitude, longitude, location_id)
+                self.conn.execute(
+                    'INSERT INTO geo_members (location_id, x, y, latitude, longitude) VALUES (?, ?, ?, ?, ?)',
+                    (location_id, x, y, latitude, longitude)
+                )
+
+        self.conn.executemany(UPSERT_CELL, (
+            (zoom, x, y, count, lat_sum, lon_sum, location_id)
+            for (zoom, x, y), (count, lat_sum, lon_sum, location_id) in deltas.items()
+        ))
+        self.conn.execute('DELETE FROM geo_cells WHERE count <= 0')
+
+        if removed:
+            self._reassign_representatives(removed)
+
+    def _reassign_representatives(self, removed: List[int]):
+        """Pick a new representative for cells whose one was moved or deleted"""
+        placeholders = ','.join('?' * len(removed))
+        cells = self.conn.execute(
+            f'SELECT zoom, x, y FROM geo_cells WHERE location_id IN ({placeholders})', removed
+        ).fetchall()
+        for zoom, x, y in cells:
+            shift = MAX_ZOOM - zoom
+            row = self.conn.execute(
+                'SELECT MIN(location_id) FROM geo_members WHERE x BETWEEN ? AND ? AND y BETWEEN ? AND ?',
+                (x << shift, ((x + 1) << shift) - 1, y << shift, ((y + 1) << shift) - 1)
+            ).fetchone()
+            self.conn.execute(
+                'UPDATE geo_cells SET location_id = ? WHERE zoom = ? AND x = ? AND y = ?', (row[0], zoom, x, y)
+            )
+
+    def rebuild(self) -> int:
+        """Recompute every cell from scratch"""
+        with self.conn:
+            self.conn.execute('DELETE FROM geo_cells')
+            self.conn.execute('DELETE FROM geo_members')
+            self.conn.execute(
+                'INSERT OR IGNORE INTO geo_pending (location_id) '
+                'SELECT id FROM locations WHERE latitude IS NOT NULL AND longitude IS NOT NULL'
+            )
+        return self.refresh()
+
+    def cells_in_view(self, zoom: int, min_lat: float, max_lat: float,
+                      min_lon: float, max_lon: float) -> List[Dict]:
+        """Clusters of the cells covering a bounding box.
+
+        One index range per tile column, so the cost follows the number of
+        cells in view. A box with min_lon > max_lon crosses the antimeridian.
+        """
+        zoom = max(0, min(zoom, MAX_ZOOM))
+        x_min, y_min = tile_for(max_lat, min_lon, zoom)
+        x_max, y_max = tile_for(min_lat, max_lon, zoom)
+        columns = range(x_min, x_max + 1) if x_min <= x_max else \
+            list(range(x_min, 1 << zoom)) + list(range(0, x_max + 1))
+
+        cells = []
+        for x in columns:
+            cells.extend(self._column(zoom, x, y_min, y_max))
+        return cells
+
+    def tile(self, zoom: int, x: int, y: int) -> List[Dict]:
+        """Clusters inside one map tile, 2 ** TILE_CELL_DEPTH cells per side"""
+        depth = max(0, min(TILE_CELL_DEPTH, MAX_ZOOM - zoom))
+        cell_zoom = zoom + depth
+        size = 1 << depth
+        cells = []
+        for column in range(x * size, (x + 1) * size):
+            cells.extend(self._column(cell_zoom, column, y * size, (y + 1) * size - 1))
+        return cells
+
+    def _column(self, zoom: int, x: int, y_min: int, y_max: int) -> Iterator[Dict]:
+        rows = self.conn.execute(
+            """SELECT y, count, lat_sum, lon_sum, location_id FROM geo_cells
+               WHERE zoom = ? AND x = ? AND y BETWEEN ? AND ?""",
+            (zoom, x, y_min, y_max)
+        )
+        for y, count, lat_sum, lon_sum, location_id in rows:
+            yield {
+                'zoom': zoom,
+                'x': x,
+                'y': y,
+                'count': count,
+                'latitude': round(lat_sum / count, 6),
+                'longitude': round(lon_sum / count, 6),
+                'location_id': location_id
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precomputed map clusters over the local store')
+    parser.add_argument('--db', default='filming_locations.db', help='Local store built by scripts/local-store.py')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    refresh_parser = commands.add_parser('refresh', help='Apply queued location changes')
+    refresh_parser.add_argument('--rebuild', action='store_true', help='Recompute all cells from scratch')
+
+    view_parser = commands.add_parser('view', help='Print the clusters covering a bounding box')
+    view_parser.add_argument('zoom', type=int)
+    view_parser.add_argument('min_lat', type=float)
+    view_parser.add_argument('max_lat', type=float)
+    view_parser.add_argument('min_lon', type=float)
+    view_parser.add_argument('max_lon', type=float)
+
+    args = parser.parse_args()
+    aggregates = GeoAggregates(args.db)
+
+    if args.command == 'refresh':
+        count = aggregates.rebuild() if args.rebuild else aggregates.refresh()
+        print(f"Aggregated {count} changed locations")
+    else:
+        for cell in aggregates.cells_in_view(args.zoom, args.min_lat, args.max_lat, args.min_lon, args.max_lon):
+            print(f"{cell['zoom']}/{cell['x']}/{cell['y']}: {cell['count']} "
+                  f"near {cell['latitude']}, {cell['longitude']} (location {cell['location_id']})")
+    aggregates.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""
+Local SQLite copy of the filming locations data.
+
+Mirrors the productions / locations / filming_locations tables from Supabase
+so scraper output can be loaded and queried without touching the upstream
+database. Accepts the JSON/NDJSON files written by the scrapers:
+
+- imdb_locations.json      (FilmingLocation dicts)
+- wikipedia_locations.json (dicts with name/location_name and source)
+- reddit_locations.json    (dicts with production_title/source_url/upvotes)
+- sample_locations.json    (TMDB fetcher output with nested locations)
+
+A filming_locations row is one production filmed at one location according
+to one source, so several scraper records (two Reddit posts about the same
+place, or a scene that was reworded between runs) can describe the same
+row. The record_keys table maps every loaded record's key to its row. Delta
+files from scripts/snapshot-diff.py can be applied directly: inserts and
+updates are upserted, and {"key": ...} lines from a deletes file detach
+that key; a row is only removed once no loaded record refers to it.
+
+Usage: python scripts/local-store.py imdb_locations.json reddit_locations.json ...
+"""
+
+import hashlib
+import importlib.util
+import math
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Import using the actual filename
+spec = importlib.util.spec_from_file_location(
+    "location_record", Path(__file__).parent.parent / "scrapers" / "location-record.py"
+)
+location_record = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(location_record)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS productions (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    type TEXT NOT NULL DEFAULT 'movie',
+    release_year INTEGER,
+    imdb_id TEXT UNIQUE,
+    tmdb_id TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS productions_title_key ON productions (title) WHERE imdb_id IS NULL;
+
+CREATE TABLE IF NOT EXISTS locations (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    address TEXT,
+    city TEXT,
+    state_province TEXT,
+    country TEXT NOT NULL DEFAULT '',
+    latitude REAL,
+    longitude REAL,
+    UNIQUE (name, city, country)
+);
+CREATE INDEX IF NOT EXISTS locations_coordinates ON locations (latitude, longitude);
+
+CREATE TABLE IF NOT EXISTS filming_locations (
+    id INTEGER PRIMARY KEY,
+    production_id INTEGER NOT NULL REFERENCES productions (id),
+    location_id INTEGER NOT NULL REFERENCES locations (id),
+    scene_description TEXT,
+    source TEXT NOT NULL,
+    source_url TEXT,
+    UNIQUE (production_id, location_id, source)
+);
+CREATE INDEX IF NOT EXISTS filming_locations_production ON filming_locations (production_id, id);
+CREATE INDEX IF NOT EXISTS filming_locations_location ON filming_locations (location_id, id);
+
+CREATE TABLE IF NOT EXISTS record_keys (
+    key TEXT PRIMARY KEY,
+    filming_location_id INTEGER NOT NULL REFERENCES filming_locations (id)
+);
+CREATE INDEX IF NOT EXISTS record_keys_filming_location ON record_keys (filming_location_id);
+"""
+
+EARTH_RADIUS_KM = 6371.0
+
+
+class LocalLocationStore:
+    def __init__(self, db_path: str = 'filming_locations.db', readonly: bool = False):
+        self.db_path = db_path
+        if readonly:
+            self.conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            self.conn.executescript(SCHEMA)
+            self._migrate()
+        self.conn.row_factory = sqlite3.Row
+        self.conn.create_function('haversine_km', 4, haversine_km, deterministic=True)
+
+    def _migrate(self):
+        """Move record keys kept on filming_locations rows into record_keys"""
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(filming_locations)')}
+        if 'record_key' in columns:
+            with self.conn:
+                self.conn.execute(
+                    """INSERT OR IGNORE INTO record_keys (key, filming_location_id)
+                       SELECT record_key, id FROM filming_locations WHERE record_key IS NOT NULL"""
+                )
+                self.conn.execute('DROP INDEX IF EXISTS filming_locations_record_key')
+                self.conn.execute('ALTER TABLE filming_locations DROP COLUMN record_key')
+
+    def close(self):
+        self.conn.close()
+
+    def data_version(self) -> int:
+        """Changes whenever another connection commits to the database"""
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def add_record(self, record: Dict) -> Optional[int]:
+        """Insert or update one scraper record, returning the filming_locations id
+
+        The record's scene and URL replace those of the row it maps to. A key
+        loaded before that now maps to a different production or location
+        moves to that row, and the old row goes once no key refers to it.
+        Coordinates of a record loaded before overwrite the location's; new
+        records only fill in missing coordinates.
+        """
+        production_title = record_production_title(record)
+        source = record_source(record)
+
+        location_name = record.get('name') or record.get('location_name')
+        if not production_title or not location_name:
+            return None
+
+        key = record_key(record)
+        previous = self.conn.execute(
+            'SELECT filming_location_id FROM record_keys WHERE key = ?', (key,)
+        ).fetchone()
+
+        production_id = self._production_id(
+            production_title,
+            record.get('production_type') or record.get('type') or 'movie',
+            record.get('imdb_id'),
+            record.get('tmdb_id'),
+            record.get('release_year')
+        )
+        location_id = self._location_id(record, location_name, overwrite=previous is not None)
+
+        row_id = self.conn.execute(
+            """INSERT INTO filming_locations
+               (production_id, location_id, scene_description, source, source_url)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT (production_id, location_id, source) DO UPDATE
+               SET scene_description = excluded.scene_description, source_url = excluded.source_url
+               RETURNING id""",
+            (production_id, location_id, record.get('scene_description'), source, record.get('source_url'))
+        ).fetchone()[0]
+
+        self.conn.execute(
+            """INSERT INTO record_keys (key, filming_location_id) VALUES (?, ?)
+               ON CONFLICT (key) DO UPDATE SET filming_location_id = excluded.filming_location_id""",
+            (key, row_id)
+        )
+        if previous and previous[0] != row_id:
+            self._release(previous[0])
+        return row_id
+
+    def delete_record(self, key: str) -> bool:
+        """Detach a record_key, removing its filming location if no other record shares it"""
+        row = self.conn.execute('SELECT filming_location_id FROM record_keys WHERE key = ?', (key,)).fetchone()
+        if not row:
+            return False
+        self.conn.execute('DELETE FROM record_keys WHERE key = ?', (key,))
+        self._release(row[0])
+        return True
+
+    def _release(self, row_id: int):
+        """Delete a filming location no record_key refers to any more"""
+        if self.conn.execute('SELECT 1 FROM record_keys WHERE filming_location_id = ?', (row_id,)).fetchone():
+            return
+        row = self.conn.execute(
+            'DELETE FROM filming_locations WHERE id = ? RETURNING production_id, location_id', (row_id,)
+        ).fetchone()
+        if row:
+            self._prune(row[0], row[1])
+
+    def _prune(self, production_id: int, location_id: int):
+        """Drop a production or location that no filming location refers to any more"""
+        self.conn.execute(
+            """DELETE FROM productions WHERE id = ?
+               AND NOT EXISTS (SELECT 1 FROM filming_locations WHERE production_id = ?)""",
+            (production_id, production_id)
+        )
+        self.conn.execute(
+            """DELETE FROM locations WHERE id = ?
+               AND NOT EXISTS (SELECT 1 FROM filming_locations WHERE location_id = ?)""",
+            (location_id, location_id)
+        )
+
+    def _production_id(self, title: str, production_type: str, imdb_id: Optional[str],
+                       tmdb_id: Optional[str], release_year: Optional[int]) -> int:
+        if imdb_id:
+            row = self.conn.execute('SELECT id FROM productions WHERE imdb_id = ?', (imdb_id,)).fetchone()
+        else:
+            row = self.conn.execute(
+                'SELECT id FROM productions WHERE title = ? AND imdb_id IS NULL', (title,)
+            ).fetchone()
+        if row:
+            return row[0]
+
+        cursor = self.conn.execute(
+            'INSERT INTO productions (title, type, release_year, imdb_id, tmdb_id) VALUES (?, ?, ?, ?, ?)',
+            (title, production_type, release_year, imdb_id, tmdb_id)
+        )
+        return cursor.lastrowid
+
+    def _location_id(self, record: Dict, name: str, overwrite: bool = False) -> int:
+        city = record.get('city')
+        country = record.get('country') or ''
+        row = self.conn.execute(
+            'SELECT id, latitude, longitude FROM locations WHERE name = ? AND city IS ? AND country = ?',
+            (name, city, country)
+        ).fetchone()
+        if row:
+            # Fill in coordinates when a later source has them, or replace
+            # them when the record is an update of one loaded before
+            latitude, longitude = record.get('latitude'), record.get('longitude')
+            if latitude is not None and (row['latitude'] is None or
+                                         (overwrite and (latitude, longitude) != (row['latitude'], row['longitude']))):
+                self.conn.execute(
+                    'UPDATE locations SET latitude = ?, longitude = ? WHERE id = ?', (latitude, longitude, row['id'])
+                )
+            if overwrite and record.get('address'):
+                self.conn.execute('UPDATE locations SET address = ? WHERE id = ?', (record['address'], row['id']))
+            return row['id']
+
+        cursor = self.conn.execute(
+            """INSERT INTO locations
+               (name, address, city, state_province, country, latitude, longitude)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (name, record.get('address'), city, record.get('state_province') or record.get('state'),
+             country, record.get('latitude'), record.get('longitude'))
+        )
+        return cursor.lastrowid
+
+    def load_file(self, path: str) -> Tuple[int, int]:
+        """Load a scraper JSON/NDJSON output or delta file.
+
+        Returns (records added or updated, records deleted). Lines holding only
+        a "key" (snapshot-diff deletes files) detach that record's key.
+        """
+        added = deleted = 0
+        with self.conn:
+            for record in iter_records(path):
+                if set(record) == {'key'}:
+                    deleted += self.delete_record(record['key'])
+                elif self.add_record(record):
+                    added += 1
+        return added, deleted
+
+    def locations_for_production(self, production_id: int, after_id: int = 0, limit: int = 50) -> List[Dict]:
+        """Filming locations of a production, keyset-paginated by filming_locations.id"""
+        rows = self.conn.execute(
+            """SELECT fl.id, fl.scene_description, fl.source, fl.source_url,
+                      l.id AS location_id, l.name, l.address, l.city, l.state_province,
+                      l.country, l.latitude, l.longitude
+               FROM filming_locations fl JOIN locations l ON l.id = fl.location_id
+               WHERE fl.production_id = ? AND fl.id > ?
+               ORDER BY fl.id LIMIT ?""",
+            (production_id, after_id, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def productions_for_location(self, location_id: int, after_id: int = 0, limit: int = 50) -> List[Dict]:
+        """Productions filmed at a location, keyset-paginated by filming_locations.id"""
+        rows = self.conn.execute(
+            """SELECT fl.id, fl.scene_description, fl.source, fl.source_url,
+                      p.id AS production_id, p.title, p.type, p.release_year, p.imdb_id, p.tmdb_id
+               FROM filming_locations fl JOIN productions p ON p.id = fl.production_id
+               WHERE fl.location_id = ? AND fl.id > ?
+               ORDER BY fl.id LIMIT ?""",
+            (location_id, after_id, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def locations_near(self, lat: float, lon: float, radius_km: float,
+                       after: Optional[Tuple[float, int]] = None, limit: int = 50) -> List[Dict]:
+        """Geocoded locations within radius_km ordered by (distance_km, id).
+
+        The coordinate index narrows rows to the bounding box of the circle,
+        split in two where it crosses the antimeridian. SQLite then orders by
+        distance with a bounded sort, so only `limit` rows past the
+        (distance_km, id) cursor come back.
+        """
+        min_lat, max_lat, lon_ranges = bounding_box(lat, lon, radius_km)
+        after_distance, after_id = after if after else (-1.0, 0)
+        rows = self.conn.execute(
+            f"""SELECT * FROM (
+                    SELECT id, name, address, city, state_province, country, latitude, longitude,
+                           round(haversine_km(?, ?, latitude, longitude), 6) AS distance_km
+                    FROM locations
+                    WHERE latitude BETWEEN ? AND ?
+                      AND ({' OR '.join(['longitude BETWEEN ? AND ?'] * len(lon_ranges))})
+                )
+                WHERE distance_km <= ? AND (distance_km, id) > (?, ?)
+                ORDER BY distance_km, id LIMIT ?""",
+            (lat, lon, min_lat, max_lat, *(bound for lon_range in lon_ranges for bound in lon_range),
+             radius_km, after_distance, after_id, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, List[Tuple[float, float]]]:
+    """Latitude bounds and longitude ranges covering a circle on the globe"""
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = lat - lat_delta, lat + lat_delta
+    if min_lat <= -90 or max_lat >= 90:
+        # The circle contains a pole, so every longitude is in range
+        return max(min_lat, -90.0), min(max_lat, 90.0), [(-180.0, 180.0)]
+
+    ratio = math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat))
+    lon_delta = math.degrees(math.asin(min(1.0, ratio)))
+    west, east = lon - lon_delta, lon + lon_delta
+    if west < -180:
+        return min_lat, max_lat, [(west + 360, 180.0), (-180.0, east)]
+    if east > 180:
+        return min_lat, max_lat, [(west, 180.0), (-180.0, east - 360)]
+    return min_lat, max_lat, [(west, east)]
+
+
+def record_source(record: Dict) -> str:
+    """Source tag of a scraper record, e.g. 'imdb' or 'reddit:MovieLocations'"""
+    return record.get('source') or ('imdb' if record.get('imdb_id') else 'local')
+
+
+def record_production_title(record: Dict) -> Optional[str]:
+    """Production title of a scraper record"""
+    title = record.get('production_title')
+    source = record_source(record)
+
+    # Wikipedia records carry the page title in their source
+    if not title and source.startswith('wikipedia:'):
+        title = source.split(':', 1)[1]
+    return title
+
+
+def record_key(record: Dict) -> str:
+    """Stable identity of a scraper record across runs.
+
+    The IMDb parser keeps only the first part of an address as location_name,
+    so the place fields are part of the key. Records without a source_url
+    (one production can list the same place for several scenes) also include
+    a digest of the scene description.
+    """
+    parts = [
+        record_source(record),
+        record.get('source_url') or record.get('imdb_id') or record_production_title(record) or '',
+        record.get('location_name') or record.get('name') or '',
+        record.get('city') or '',
+        record.get('state_province') or record.get('state') or '',
+        record.get('country') or ''
+    ]
+    scene = ' '.join((record.get('scene_description') or '').split())
+    if scene and not record.get('source_url'):
+        parts.append(hashlib.sha1(scene.encode('utf-8')).hexdigest()[:12])
+    return '|'.join(parts)
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """Yield flat location records from any scraper output or delta file.
+
+    Every record is decoded and validated as a LocationRecord
+    (scrapers/location-record.py), so all sources come out in one shape;
+    invalid records are reported and skipped. {"key": ...} delete markers
+    pass through unchanged.
+    """
+    def skip(where, error: location_record.RecordError):
+        print(f"Skipping invalid record {where} of {path}: {error}")
+
+    with open(path, 'rb') as f:
+        if path.endswith('.ndjson') or path.endswith('.jsonl'):
+            for record in location_record.iter_ndjson(f, lambda number, e: skip(f"on line {number}", e)):
+                yield record if isinstance(record, dict) else location_record.to_dict(record)
+            return
+        items = location_record.loads(f.read())
+
+    for index, item in enumerate(items):
+        # TMDB fetcher output nests locations under each production
+        if 'locations' in item and isinstance(item['locations'], list):
+            title = item.get('production_title') or item.get('title')
+            flattened = [{**location, 'production_title': title} for location in item['locations']]
+        else:
+            flattened = [item]
+        for record in flattened:
+            try:
+                yield location_record.to_dict(location_record.from_dict(record))
+            except (location_record.RecordError, KeyError, TypeError) as e:
+                skip(f"#{index}", e)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/local-store.py <scraper output files...>")
+        sys.exit(1)
+
+    store = LocalLocationStore()
+    for path in sys.argv[1:]:
+        added, deleted = store.load_file(path)
+        print(f"Loaded {added} filming locations from {path}" + (f", deleted {deleted}" if deleted else ""))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Read-only HTTP API over the local location store (scripts/local-store.py).
+
+Endpoints:
+    GET /productions/{id}/locations?limit=&cursor=
+    GET /locations/{id}/productions?limit=&cursor=
+    GET /locations/nearby?lat=&lon=&radius_km=&limit=&cursor=
+    GET /tiles/{zoom}/{x}/{y}
+    GET /clusters?zoom=&min_lat=&max_lat=&min_lon=&max_lon=
+
+Lists are keyset-paginated: each page returns `next_cursor`, which is passed
+back as `cursor` to fetch the following page. Responses carry an ETag and
+honour If-None-Match, and serialized responses for hot queries are kept in
+an in-process LRU cache that is dropped whenever the database changes.
+
+The tile and cluster endpoints read the precomputed cells maintained by
+scripts/geo-aggregates.py. Cells are returned as compact
+[x, y, count, latitude, longitude, location_id] rows.
+
+Usage: python scripts/read-api-server.py [--db filming_locations.db] [--port 8080]
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import importlib.util
+import json
+import math
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+# Import using the actual filename
+spec = importlib.util.spec_from_file_location("local_store", Path(__file__).parent / "local-store.py")
+local_store = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(local_store)
+LocalLocationStore = local_store.LocalLocationStore
+
+spec = importlib.util.spec_from_file_location("geo_aggregates", Path(__file__).parent / "geo-aggregates.py")
+geo_aggregates = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(geo_aggregates)
+GeoAggregates = geo_aggregates.GeoAggregates
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+MAX_VIEW_CELLS = 4096
+CELL_FIELDS = ['x', 'y', 'count', 'latitude', 'longitude', 'location_id']
+
+
+class LRUCache:
+    """Small ordered-dict LRU for serialized responses"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+
+    def get(self, key):
+        if key not in self._items:
+            return None
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+def encode_cursor(values: List) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[List]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        raise web.HTTPBadRequest(reason='Invalid cursor')
+    if not isinstance(values, list):
+        raise web.HTTPBadRequest(reason='Invalid cursor')
+    return values
+
+
+class LocationReadAPI:
+    def __init__(self, store: LocalLocationStore, cache_size: int = 1024,
+                 aggregates: Optional[GeoAggregates] = None):
+        self.store = store
+        self.aggregates = aggregates
+        self.cache = LRUCache(cache_size)
+        self._data_version = store.data_version()
+        # Queries run on one thread off the event loop; the connection is shared
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def close(self):
+        self._executor.shutdown()
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/locations/nearby', self.nearby_locations)
+        app.router.add_get('/productions/{production_id}/locations', self.production_locations)
+        app.router.add_get('/locations/{location_id}/productions', self.location_productions)
+        app.router.add_get('/tiles/{zoom}/{x}/{y}', self.tile_clusters)
+        app.router.add_get('/clusters', self.viewport_clusters)
+        return app
+
+    async def production_locations(self, request: web.Request) -> web.Response:
+        production_id = _int_param(request.match_info['production_id'], 'production_id')
+        return await self._respond(request, lambda: self._keyset_page(
+            request, lambda after_id, limit: self.store.locations_for_production(production_id, after_id, limit)
+        ))
+
+    async def location_productions(self, request: web.Request) -> web.Response:
+        location_id = _int_param(request.match_info['location_id'], 'location_id')
+        return await self._respond(request, lambda: self._keyset_page(
+            request, lambda after_id, limit: self.store.productions_for_location(location_id, after_id, limit)
+        ))
+
+    async def nearby_locations(self, request: web.Request) -> web.Response:
+        lat = _float_param(request.query.get('lat'), 'lat')
+        lon = _float_param(request.query.get('lon'), 'lon')
+        radius_km = _float_param(request.query.get('radius_km', '10'), 'radius_km')
+        if not -90 <= lat <= 90 or not -180 <= lon <= 180 or not 0 < radius_km <= 500:
+            raise web.HTTPBadRequest(reason='lat/lon out of range or radius_km not in (0, 500]')
+        return await self._respond(request, lambda: self._nearby_page(request, lat, lon, radius_km))
+
+    async def tile_clusters(self, request: web.Request) -> web.Response:
+        zoom = _int_param(request.match_info['zoom'], 'zoom')
+        x = _int_param(request.match_info['x'], 'x')
+        y = _int_param(request.match_info['y'], 'y')
+        if not 0 <= zoom <= geo_aggregates.MAX_ZOOM or not 0 <= x < 1 << zoom or not 0 <= y < 1 << zoom:
+            raise web.HTTPBadRequest(reason='Tile out of range')
+        cell_zoom = min(zoom + geo_aggregates.TILE_CELL_DEPTH, geo_aggregates.MAX_ZOOM)
+        return await self._respond(request, lambda: self._clusters(cell_zoom, lambda: self.aggregates.tile(zoom, x, y)))
+
+    async def viewport_clusters(self, request: web.Request) -> web.Response:
+        zoom = _int_param(request.query.get('zoom'), 'zoom')
+        min_lat, max_lat, min_lon, max_lon = (
+            _float_param(request.query.get(name), name) for name in ('min_lat', 'max_lat', 'min_lon', 'max_lon')
+        )
+        if not 0 <= zoom <= geo_aggregates.MAX_ZOOM or not -90 <= min_lat <= max_lat <= 90 \
+                or not -180 <= min_lon <= 180 or not -180 <= max_lon <= 180:
+            raise web.HTTPBadRequest(reason='zoom or bounding box out of range')
+
+        # Refuse viewports that would touch more cells than a screen can show
+        x_min, y_min = geo_aggregates.tile_for(max_lat, min_lon, zoom)
+        x_max, y_max = geo_aggregates.tile_for(min_lat, max_lon, zoom)
+        columns = (x_max - x_min) % (1 << zoom) + 1
+        if columns * (y_max - y_min + 1) > MAX_VIEW_CELLS:
+            raise web.HTTPBadRequest(reason=f'Viewport covers more than {MAX_VIEW_CELLS} cells; use a lower zoom')
+
+        return await self._respond(request, lambda: self._clusters(
+            zoom, lambda: self.aggregates.cells_in_view(zoom, min_lat, max_lat, min_lon, max_lon)
+        ))
+
+    def _clusters(self, zoom: int, fetch) -> Dict:
+        """Compact cluster rows from the precomputed geo cells"""
+        if self.aggregates is None:
+            raise web.HTTPServiceUnavailable(reason='Geo aggregates are not available')
+        try:
+            cells = fetch()
+        except sqlite3.OperationalError:
+            raise web.HTTPServiceUnavailable(reason='Run scripts/geo-aggregates.py refresh first')
+        return {
+            'zoom': zoom,
+            'fields': CELL_FIELDS,
+            'cells': [[cell[field] for field in CELL_FIELDS] for cell in cells]
+        }
+
+    def _keyset_page(self, request: web.Request, fetch) -> Dict:
+        """Page through rows ordered by id using `id > last seen id`"""
+        limit = _limit_param(request)
+        cursor = decode_cursor(request.query.get('cursor'))
+        after_id = _int_param(cursor[0], 'cursor') if cursor else 0
+
+        # Fetch one extra row to know whether another page exists
+        rows = fetch(after_id, limit + 1)
+        next_cursor = encode_cursor([rows[limit - 1]['id']]) if len(rows) > limit else None
+        return {'data': rows[:limit], 'next_cursor': next_cursor}
+
+    def _nearby_page(self, request: web.Request, lat: float, lon: float, radius_km: float) -> Dict:
+        """Locations within radius_km ordered by (distance, id)"""
+        limit = _limit_param(request)
+        cursor = decode_cursor(request.query.get('cursor'))
+        after: Optional[Tuple[float, int]] = None
+        if cursor:
+            if len(cursor) != 2:
+                raise web.HTTPBadRequest(reason='Invalid cursor')
+            after = (_float_param(cursor[0], 'cursor'), _int_param(cursor[1], 'cursor'))
+
+        # Fetch one extra row to know whether another page exists
+        rows = self.store.locations_near(lat, lon, radius_km, after, limit + 1)
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor([last['distance_km'], last['id']])
+        return {'data': rows[:limit], 'next_cursor': next_cursor}
+
+    async def _respond(self, request: web.Request, build) -> web.Response:
+        """Serve from cache when possible and answer conditional requests"""
+        version = self.store.data_version()
+        if version != self._data_version:
+            self.cache.clear()
+            self._data_version = version
+
+        key = request.rel_url.path_qs
+        cached = self.cache.get(key)
+        if cached is None:
+            data = await asyncio.get_running_loop().run_in_executor(self._executor, build)
+            body = json.dumps(data, separators=(',', ':')).encode()
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            cached = (body, etag)
+            self.cache.put(key, cached)
+
+        body, etag = cached
+        headers = {'ETag': etag, 'Cache-Control': 'public, max-age=60'}
+
+        if_none_match = request.headers.get('If-None-Match', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+            return web.Response(status=304, headers=headers)
+
+        return web.Response(body=body, content_type='application/json', headers=headers)
+
+
+def _int_param(value, name: str) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise web.HTTPBadRequest(reason=f'{name} must be an integer')
+
+
+def _float_param(value, name: str) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise web.HTTPBadRequest(reason=f'{name} must be a number')
+    if not math.isfinite(number):
+        raise web.HTTPBadRequest(reason=f'{name} must be a number')
+    return number
+
+
+def _limit_param(request: web.Request) -> int:
+    limit = _int_param(request.query.get('limit', DEFAULT_LIMIT), 'limit')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def create_app(db_path: str = 'filming_locations.db', cache_size: int = 1024) -> web.Application:
+    store = LocalLocationStore(db_path, readonly=True)
+    aggregates = GeoAggregates(db_path, readonly=True)
+    api = LocationReadAPI(store, cache_size, aggregates)
+    app = api.create_app()
+
+    async def close_store(app):
+        api.close()
+        store.close()
+        aggregates.close()
+
+    app.on_cleanup.append(close_store)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the local location store over HTTP')
+    parser.add_argument('--db', default='filming_locations.db', help='Local store built by scripts/local-store.py')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--cache-size', type=int, default=1024, help='Responses kept in the LRU cache')
+    args = parser.parse_args()
+
+    web.run_app(create_app(args.db, args.cache_size), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
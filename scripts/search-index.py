@@ -0,0 +1,201 @@
+"""
+Full-text search over scraper output using SQLite FTS5.
+
+Indexes location names, production titles and scene descriptions (including
+the Reddit selftext snippets) so queries are answered from an inverted index
+ranked with BM25 instead of scanning every record. Records can be added at
+any time; re-adding a record with the same key replaces the old entry, and
+{"key": ...} lines from a scripts/snapshot-diff.py deletes file remove it.
+
+Query syntax:
+    prison exteriors      all terms must match
+    "prison exteriors"    exact phrase
+    dine*                 prefix match
+
+Usage:
+    python scripts/search-index.py add imdb_locations.json reddit_archive_locations.ndjson
+    python scripts/search-index.py search "prison exteriors"
+    python scripts/search-index.py optimize
+"""
+
+import argparse
+import importlib.util
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+# Import using the actual filename
+spec = importlib.util.spec_from_file_location("local_store", Path(__file__).parent / "local-store.py")
+local_store = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(local_store)
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS location_search USING fts5(
+    location_name,
+    production_title,
+    scene_description,
+    source UNINDEXED,
+    record UNINDEXED,
+    tokenize = 'porter unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+CREATE TABLE IF NOT EXISTS search_keys (
+    key TEXT PRIMARY KEY,
+    doc_id INTEGER NOT NULL
+);
+"""
+
+# Column weights for bm25(): location_name, production_title, scene_description
+BM25_WEIGHTS = (4.0, 2.0, 1.0)
+
+QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+class LocationSearchIndex:
+    def __init__(self, db_path: str = 'search_index.db'):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def add_records(self, records: Iterable[Dict]) -> Tuple[int, int]:
+        """Index records, replacing earlier versions with the same key.
+
+        Returns (records indexed, records deleted). Records holding only a
+        "key" remove the entry indexed under that key.
+        """
+        added = deleted = 0
+        with self.conn:
+            for record in records:
+                if set(record) == {'key'}:
+                    deleted += self.delete_record(record['key'])
+                    continue
+
+                location_name = record.get('location_name') or record.get('name')
+                if not location_name:
+                    continue
+
+                key = local_store.record_key(record)
+                row = self.conn.execute('SELECT doc_id FROM search_keys WHERE key = ?', (key,)).fetchone()
+                if row:
+                    self.conn.execute('DELETE FROM location_search WHERE rowid = ?', (row[0],))
+
+                cursor = self.conn.execute(
+                    """INSERT INTO location_search
+                       (location_name, production_title, scene_description, source, record)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    (location_name, local_store.record_production_title(record),
+                     record.get('scene_description'), local_store.record_source(record), json.dumps(record))
+                )
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO search_keys (key, doc_id) VALUES (?, ?)', (key, cursor.lastrowid)
+                )
+                added += 1
+        return added, deleted
+
+    def add_file(self, path: str) -> Tuple[int, int]:
+        """Index a scraper JSON/NDJSON output or snapshot-diff delta file"""
+        return self.add_records(local_store.iter_records(path))
+
+    def delete_record(self, key: str) -> bool:
+        """Remove the entry indexed under a record key"""
+        row = self.conn.execute('SELECT doc_id FROM search_keys WHERE key = ?', (key,)).fetchone()
+        if not row:
+            return False
+        self.conn.execute('DELETE FROM location_search WHERE rowid = ?', (row[0],))
+        self.conn.execute('DELETE FROM search_keys WHERE key = ?', (key,))
+        return True
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict]:
+        """Return the best matching records, most relevant first"""
+        match = self._build_match(query)
+        if not match:
+            return []
+
+        rows = self.conn.execute(
+            f"""SELECT record, bm25(location_search, {', '.join(map(str, BM25_WEIGHTS))}) AS score
+                FROM location_search
+                WHERE location_search MATCH ?
+                ORDER BY score LIMIT ? OFFSET ?""",
+            (match, limit, offset)
+        ).fetchall()
+
+        results = []
+        for record, score in rows:
+            result = json.loads(record)
+            # bm25() is lower-is-better; flip it so callers see higher-is-better
+            result['score'] = -score
+            results.append(result)
+        return results
+
+    def optimize(self):
+        """Merge all index segments into one.
+
+        This rewrites the whole index, so it is left to the `optimize`
+        command after a bulk load; FTS5's automerge keeps segment counts in
+        check during incremental adds.
+        """
+        with self.conn:
+            self.conn.execute("INSERT INTO location_search (location_search) VALUES ('optimize')")
+
+    def _build_match(self, query: str) -> str:
+        """Turn user input into a safe FTS5 MATCH expression"""
+        terms = []
+        for phrase, word in QUERY_TOKEN.findall(query):
+            if phrase:
+                text = phrase.replace('"', ' ').strip()
+                if text:
+                    terms.append(f'"{text}"')
+                continue
+
+            prefix = word.endswith('*')
+            # Drop characters FTS5 would treat as syntax
+            word = re.sub(r'[^\w]+', ' ', word).strip()
+            if not word:
+                continue
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+        return ' AND '.join(terms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Full-text search over scraped filming locations')
+    parser.add_argument('--db', default='search_index.db', help='Search index database')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help='Index scraper output files')
+    add.add_argument('files', nargs='+')
+
+    search = commands.add_parser('search', help='Query the index')
+    search.add_argument('query')
+    search.add_argument('--limit', type=int, default=20)
+
+    commands.add_parser('optimize', help='Merge index segments after a bulk load')
+
+    args = parser.parse_args()
+    index = LocationSearchIndex(args.db)
+
+    if args.command == 'add':
+        for path in args.files:
+            added, deleted = index.add_file(path)
+            print(f"Indexed {added} records from {path}" + (f", deleted {deleted}" if deleted else ""))
+    elif args.command == 'optimize':
+        index.optimize()
+        print("Optimized search index")
+    else:
+        start = time.perf_counter()
+        results = index.search(args.query, args.limit)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for result in results:
+            print(f"- {result.get('location_name') or result.get('name')} "
+                  f"[{local_store.record_production_title(result)}] ({result['score']:.2f})")
+        print(f"\n{len(results)} results in {elapsed_ms:.1f} ms")
+
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Delta stage: compare a scraper run against the previous run's snapshot.
+
+Each record is normalized and hashed under a stable key (see record_key in
+scripts/local-store.py). Key/hash pairs from the previous run live in an
+on-disk SQLite index, so the comparison is a keyed join rather than an
+in-memory load of both dumps. Only the changes are written out:
+
+    <out>/<name>.inserts.ndjson   records not seen before
+    <out>/<name>.updates.ndjson   records whose content changed
+    <out>/<name>.deletes.ndjson   keys missing from this run
+
+All three files can be fed straight to scripts/local-store.py or
+scripts/search-index.py, which upsert inserts/updates and remove deleted
+keys, so downstream cost follows the rate of change.
+
+Records in one run that share a key are counted as duplicates and only the
+first is kept.
+
+Usage: python scripts/snapshot-diff.py imdb_locations.json [--name imdb] [--out deltas]
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable
+
+# Import using the actual filename
+spec = importlib.util.spec_from_file_location("local_store", Path(__file__).parent / "local-store.py")
+local_store = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(local_store)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot (
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (name, key)
+) WITHOUT ROWID;
+"""
+
+# Fields that change between runs without the location itself changing
+VOLATILE_FIELDS = {'upvotes'}
+
+
+def normalize_record(record: Dict) -> Dict:
+    """Canonical form used for hashing: trimmed strings, no volatile fields"""
+    normalized = {}
+    for field, value in record.items():
+        if field in VOLATILE_FIELDS:
+            continue
+        if isinstance(value, str):
+            value = ' '.join(value.split())
+        if value in ('', None):
+            continue
+        normalized[field] = value
+    return normalized
+
+
+def record_hash(record: Dict) -> str:
+    canonical = json.dumps(normalize_record(record), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+class SnapshotDiffer:
+    def __init__(self, db_path: str = 'snapshots.db'):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        # Keep the per-run staging table on disk rather than in memory
+        self.conn.execute('PRAGMA temp_store = FILE')
+
+    def close(self):
+        self.conn.close()
+
+    def diff(self, name: str, records: Iterable[Dict], out_dir: str = 'deltas', commit: bool = True) -> Dict[str, int]:
+        """Write insert/update/delete sets for one source and advance its snapshot"""
+        os.makedirs(out_dir, exist_ok=True)
+
+        self.conn.execute('DROP TABLE IF EXISTS temp.current')
+        self.conn.execute('CREATE TEMP TABLE current (key TEXT PRIMARY KEY, hash TEXT NOT NULL, record TEXT NOT NULL)')
+        duplicates = 0
+        with self.conn:
+            for r in records:
+                cursor = self.conn.execute(
+                    'INSERT OR IGNORE INTO current (key, hash, record) VALUES (?, ?, ?)',
+                    (local_store.record_key(r), record_hash(r), json.dumps(r, ensure_ascii=False))
+                )
+                duplicates += cursor.rowcount == 0
+
+        counts = {
+            'duplicates': duplicates,
+            'inserts': self._write(
+                os.path.join(out_dir, f'{name}.inserts.ndjson'),
+                """SELECT c.record FROM current c
+                   LEFT JOIN snapshot s ON s.name = ? AND s.key = c.key
+                   WHERE s.key IS NULL ORDER BY c.key""",
+                (name,)
+            ),
+            'updates': self._write(
+                os.path.join(out_dir, f'{name}.updates.ndjson'),
+                """SELECT c.record FROM current c
+                   JOIN snapshot s ON s.name = ? AND s.key = c.key
+                   WHERE s.hash != c.hash ORDER BY c.key""",
+                (name,)
+            ),
+            'deletes': self._write(
+                os.path.join(out_dir, f'{name}.deletes.ndjson'),
+                """SELECT json_object('key', s.key) FROM snapshot s
+                   WHERE s.name = ? AND NOT EXISTS (SELECT 1 FROM current c WHERE c.key = s.key)
+                   ORDER BY s.key""",
+                (name,)
+            ),
+        }
+
+        if commit:
+            with self.conn:
+                self.conn.execute('DELETE FROM snapshot WHERE name = ?', (name,))
+                self.conn.execute(
+                    'INSERT INTO snapshot (name, key, hash) SELECT ?, key, hash FROM current', (name,)
+                )
+        self.conn.execute('DROP TABLE temp.current')
+        return counts
+
+    def _write(self, path: str, query: str, params: tuple) -> int:
+        count = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            for (line,) in self.conn.execute(query, params):
+                f.write(line + '\n')
+                count += 1
+        return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export only new, changed and removed records since the last run')
+    parser.add_argument('file', help='Scraper JSON or NDJSON output')
+    parser.add_argument('--name', help='Snapshot name (defaults to the file name without extension)')
+    parser.add_argument('--out', default='deltas', help='Directory for the delta files')
+    parser.add_argument('--db', default='snapshots.db', help='Snapshot index database')
+    parser.add_argument('--dry-run', action='store_true', help='Write deltas without advancing the snapshot')
+    args = parser.parse_args()
+
+    name = args.name or Path(args.file).stem
+    differ = SnapshotDiffer(args.db)
+    counts = differ.diff(name, local_store.iter_records(args.file), args.out, commit=not args.dry_run)
+    differ.close()
+
+    print(f"{name}: {counts['inserts']} inserts, {counts['updates']} updates, {counts['deletes']} deletes")
+    if counts['duplicates']:
+        print(f"Warning: {counts['duplicates']} records shared a key with an earlier record and were skipped")
+
+
+if __name__ == "__main__":
+    main()